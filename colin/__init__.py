@@ -1 +1,13 @@
-from .core.colin import run, get_checks
+import sys
+
+from .core.colin import run, run_many, get_checks
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        # asyncio is not cheap to import, the asyncio API is imported on the first use
+        if name in ("run_async", "run_many_async"):
+            from .core import aio
+            return getattr(aio, name)
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+elif sys.version_info >= (3, 5):
+    from .core.aio import run_async, run_many_async
@@ -20,7 +20,6 @@ from colin.core.checks.containers import ContainerAbstractCheck
 from colin.core.checks.filesystem import FileCheck
 from colin.core.checks.images import ImageAbstractCheck
 from colin.core.result import CheckResult
-from colin.core.target import inspect_object
 
 
 logger = logging.getLogger(__name__)
@@ -40,12 +39,12 @@ class CmdOrEntrypointCheck(ContainerAbstractCheck, ImageAbstractCheck):
                       tags=["cmd", "entrypoint"])
 
     def check(self, target):
-        metadata = inspect_object(target.instance)["Config"]
-        cmd_present = "Cmd" in metadata and metadata["Cmd"]
+        metadata = target.metadata
+        cmd_present = bool(metadata.cmd)
         msg_cmd_present = "Cmd {}specified.".format("" if cmd_present else "not ")
         logger.debug(msg_cmd_present)
 
-        entrypoint_present = "Entrypoint" in metadata and metadata["Entrypoint"]
+        entrypoint_present = bool(metadata.entrypoint)
         msg_entrypoint_present = "Entrypoint {}specified.".format(
             "" if entrypoint_present else "not ")
         logger.debug(msg_entrypoint_present)
@@ -85,8 +84,7 @@ class NoRootCheck(ContainerAbstractCheck, ImageAbstractCheck):
                       tags=["root", "user"])
 
     def check(self, target):
-        metadata = inspect_object(target.instance)["Config"]
-        root_present = "User" in metadata and metadata["User"] in ["", "0", "root"]
+        root_present = target.metadata.user in ["", "0", "root"]
 
         return CheckResult(ok=not root_present,
                            description=self.description,
@@ -31,7 +31,17 @@ class FromTagNotLatestCheck(DockerfileAbstractCheck):
                       tags=["from", "dockerfile", "baseimage", "latest"])
 
     def check(self, target):
-        im = ImageName.parse(target.instance.baseimage)
+        base_stage = target.dockerfile.base_stage
+        if base_stage is not None:
+            # FROM refers to the previous stage, not to an image
+            return CheckResult(ok=True,
+                               description=self.description,
+                               message=self.message,
+                               reference_url=self.reference_url,
+                               check_name=self.name,
+                               logs=["Built from the stage '{}'.".format(base_stage)])
+
+        im = ImageName.parse(target.dockerfile.baseimage)
         passed = im.tag and im.tag != "latest"
         return CheckResult(ok=passed,
                            description=self.description,
@@ -15,14 +15,18 @@
 #
 
 import logging
+import os
 import sys
 
 import click
 import six
 
 from ..core.checks.abstract_check import AbstractCheck
-from ..core.colin import get_checks, run
+from ..core.colin import get_checks, run, run_many
+from ..core.constant import DEFAULT_HOST, DEFAULT_PORT
+from ..core.discovery import find_dockerfiles, is_dockerfile_name
 from ..core.exceptions import ColinException
+from ..core.observer import PrometheusExporter
 from ..core.ruleset.ruleset import get_rulesets
 from ..version import __version__
 from .default_group import DefaultGroup
@@ -53,15 +57,51 @@ def cli():
               help="Enable debugging mode (debugging logs, full tracebacks).")
 @click.option('--json', type=click.File(mode='w'),
               help="File to save the output as json to.")
+@click.option('--json-lines', type=click.File(mode='w'),
+              help="File to stream the results to as JSON Lines (one check per line), "
+                   "the results are not kept in the memory then unless --json or --timings "
+                   "is used.")
 @click.option('--stat', '-s', is_flag=True,
               help="Print statistics instead of full results.")
 @click.option('--tag', '-t', multiple=True, type=click.STRING,
               help="Filter checks with the tag.")
 @click.option('--verbose', '-v', is_flag=True,
               help="Verbose mode.")
-def check(target, ruleset, ruleset_file, debug, json, stat, tag, verbose):
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=1, show_default=True,
+              help="Number of checks running in parallel.")
+@click.option('--cache', is_flag=True,
+              help="Reuse the results of unchanged images and dockerfiles "
+                   "from the previous runs.")
+@click.option('--changed-only', is_flag=True,
+              help="Check only the dockerfiles changed since the previous run "
+                   "(the target has to be a dockerfile, a directory or a pattern, "
+                   "the unchanged dockerfiles are reported only if they failed), "
+                   "implies --cache.")
+@click.option('--cache-dir', type=click.Path(file_okay=False), envvar='COLIN_CACHE_DIR',
+              help="Directory of the result cache (default ~/.cache/colin).")
+@click.option('--processes', '-p', type=click.IntRange(min=1), default=1, show_default=True,
+              help="Number of targets (e.g. dockerfiles in a directory) "
+                   "checked in parallel processes.")
+@click.option('--timeout', type=click.FloatRange(min=0),
+              help="Seconds each check can run (0 means no limit), the checks running longer "
+                   "are stopped and reported as timed out "
+                   "(the ruleset can set timeouts of the checks).")
+@click.option('--budget', type=click.FloatRange(min=0),
+              help="Seconds all the checks can run, the checks not finished "
+                   "in time are reported as timed out.")
+@click.option('--timings', is_flag=True,
+              help="Print the time spent in the phases of the run and in the checks, "
+                   "the most expensive first.")
+@click.option('--metrics', 'metrics_file', type=click.Path(dir_okay=False),
+              help="File to write the metrics of the checks and the docker calls to "
+                   "(Prometheus text format).")
+def check(target, ruleset, ruleset_file, debug, json, json_lines, stat, tag, verbose, jobs,
+          cache, changed_only, cache_dir, processes, timeout, budget, timings, metrics_file):
     """
     Check the image/container/dockerfile (default).
+
+    TARGET can be also a directory (given as a path, e.g. ./app) or a glob pattern,
+    all the Dockerfile*/Containerfile* files found there are checked.
     """
     if ruleset and ruleset_file:
         raise click.BadOptionUsage(
@@ -73,12 +113,50 @@ def check(target, ruleset, ruleset_file, debug, json, stat, tag, verbose):
 
         log_level = _get_log_level(debug=debug,
                                    verbose=verbose)
-        results = run(target=target,
-                      ruleset_name=ruleset,
-                      ruleset_file=ruleset_file,
-                      logging_level=log_level,
-                      tags=tag)
+        exporter = PrometheusExporter() if metrics_file else None
+        dockerfiles = find_dockerfiles(target)
+        if dockerfiles is not None or changed_only:
+            if dockerfiles is not None and not dockerfiles:
+                raise ColinException("No dockerfile found for '{}'.".format(target))
+            targets = _expand_targets([target], changed_only=changed_only)
+            if not targets:
+                # images and containers would be silently skipped
+                raise ColinException("Option '--changed-only' can be used only with dockerfiles "
+                                     "(Dockerfile*/Containerfile*), '{}' is not a dockerfile."
+                                     .format(target))
+            results = run_many(targets=targets,
+                               ruleset_name=ruleset,
+                               ruleset_file=ruleset_file,
+                               logging_level=log_level,
+                               tags=tag,
+                               workers=jobs,
+                               cache=cache,
+                               cache_dir=cache_dir,
+                               processes=processes,
+                               changed_only=changed_only,
+                               timeout=timeout,
+                               budget=budget,
+                               observers=[exporter] if exporter else None)
+        else:
+            results = run(target=target,
+                          ruleset_name=ruleset,
+                          ruleset_file=ruleset_file,
+                          logging_level=log_level,
+                          tags=tag,
+                          workers=jobs,
+                          cache=cache,
+                          cache_dir=cache_dir,
+                          timeout=timeout,
+                          budget=budget,
+                          observers=[exporter] if exporter else None)
+        if json_lines:
+            # the results are kept only for the outputs going through them again
+            results.stream_json_lines_to_file(file=json_lines, keep_results=bool(json or timings))
         _print_results(results=results, stat=stat, verbose=verbose)
+        if timings:
+            _print_timings(results=results)
+        if exporter:
+            exporter.dump(metrics_file)
 
         if json:
             results.save_json_to_file(file=json)
@@ -102,6 +180,210 @@ def check(target, ruleset, ruleset_file, debug, json, stat, tag, verbose):
             raise click.ClickException(str(ex))
 
 
+@click.command(name="check-many",
+               context_settings=CONTEXT_SETTINGS)
+@click.argument('targets', nargs=-1, type=click.STRING)
+@click.option('--targets-file', '-F', type=click.File(mode='r'),
+              help="File with the targets to check, one per line ('-' for stdin).")
+@click.option('--ruleset', '-r', type=click.STRING, envvar='COLIN_RULESET',
+              help="Select a predefined ruleset (e.g. fedora).")
+@click.option('--ruleset-file', '-f', type=click.File(mode='r'),
+              help="Path to a file to use for validation "
+                   "(by default they are placed in /usr/share/colin/rulesets).")
+@click.option('--debug', default=False, is_flag=True,
+              help="Enable debugging mode (debugging logs, full tracebacks).")
+@click.option('--json', type=click.File(mode='w'),
+              help="File to save the output as json to.")
+@click.option('--json-lines', type=click.File(mode='w'),
+              help="File to stream the results to as JSON Lines (one check per line), "
+                   "the results are not kept in the memory then unless --json or --timings "
+                   "is used.")
+@click.option('--stat', '-s', is_flag=True,
+              help="Print statistics instead of full results.")
+@click.option('--tag', '-t', multiple=True, type=click.STRING,
+              help="Filter checks with the tag.")
+@click.option('--verbose', '-v', is_flag=True,
+              help="Verbose mode.")
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=1, show_default=True,
+              help="Number of checks running in parallel.")
+@click.option('--cache', is_flag=True,
+              help="Reuse the results of unchanged images and dockerfiles "
+                   "from the previous runs.")
+@click.option('--changed-only', is_flag=True,
+              help="Check only the dockerfiles changed since the previous run "
+                   "(other targets are ignored, the unchanged dockerfiles are reported "
+                   "only if they failed), implies --cache.")
+@click.option('--cache-dir', type=click.Path(file_okay=False), envvar='COLIN_CACHE_DIR',
+              help="Directory of the result cache (default ~/.cache/colin).")
+@click.option('--processes', '-p', type=click.IntRange(min=1), default=1, show_default=True,
+              help="Number of targets (e.g. dockerfiles in a directory) "
+                   "checked in parallel processes.")
+@click.option('--timeout', type=click.FloatRange(min=0),
+              help="Seconds each check can run (0 means no limit), the checks running longer "
+                   "are stopped and reported as timed out "
+                   "(the ruleset can set timeouts of the checks).")
+@click.option('--budget', type=click.FloatRange(min=0),
+              help="Seconds all the checks can run, the checks not finished "
+                   "in time are reported as timed out.")
+@click.option('--timings', is_flag=True,
+              help="Print the time spent in the phases of the run and in the checks, "
+                   "the most expensive first.")
+@click.option('--metrics', 'metrics_file', type=click.Path(dir_okay=False),
+              help="File to write the metrics of the checks and the docker calls to "
+                   "(Prometheus text format).")
+def check_many(targets, targets_file, ruleset, ruleset_file, debug, json, json_lines, stat, tag,
+               verbose, jobs, cache, changed_only, cache_dir, processes, timeout, budget,
+               timings, metrics_file):
+    """
+    Check multiple images/containers/dockerfiles in one run.
+
+    Directories (given as paths, e.g. ./app) and glob patterns are replaced
+    by the Dockerfile*/Containerfile* files found there.
+
+    With --changed-only, the list of changed files (e.g. from `git diff --name-only`)
+    can be given, only the dockerfiles are checked and only if they changed since the last run
+    (the results of the unchanged ones are reported from the cache if they failed).
+    """
+    if ruleset and ruleset_file:
+        raise click.BadOptionUsage(
+            "Options '--ruleset' and '--file-ruleset' cannot be used together.")
+
+    targets = list(targets)
+    if targets_file:
+        targets += _read_targets(targets_file)
+    targets = _expand_targets(targets, changed_only=changed_only)
+    if not targets and not changed_only:
+        raise click.UsageError("No target provided.")
+
+    try:
+        if not debug:
+            logging.basicConfig(stream=six.StringIO())
+
+        log_level = _get_log_level(debug=debug,
+                                   verbose=verbose)
+        exporter = PrometheusExporter() if metrics_file else None
+        results = run_many(targets=targets,
+                           ruleset_name=ruleset,
+                           ruleset_file=ruleset_file,
+                           logging_level=log_level,
+                           tags=tag,
+                           workers=jobs,
+                           cache=cache,
+                           cache_dir=cache_dir,
+                           processes=processes,
+                           changed_only=changed_only,
+                           timeout=timeout,
+                           budget=budget,
+                           observers=[exporter] if exporter else None)
+        if json_lines:
+            # the results are kept only for the outputs going through them again
+            results.stream_json_lines_to_file(file=json_lines, keep_results=bool(json or timings))
+        _print_results(results=results, stat=stat, verbose=verbose)
+        if timings:
+            _print_timings(results=results)
+        if exporter:
+            exporter.dump(metrics_file)
+
+        if json:
+            results.save_json_to_file(file=json)
+
+        if not results.ok:
+            sys.exit(1)
+        elif results.fail:
+            sys.exit(3)
+
+    except ColinException as ex:
+        logger.error("An error occurred: %r", ex)
+        if debug:
+            raise
+        else:
+            raise click.ClickException(str(ex))
+    except Exception as ex:
+        logger.error("An error occurred: %r", ex)
+        if debug:
+            raise
+        else:
+            raise click.ClickException(str(ex))
+
+
+@click.command(name="serve",
+               context_settings=CONTEXT_SETTINGS)
+@click.option('--ruleset', '-r', type=click.STRING, envvar='COLIN_RULESET',
+              help="Select a predefined ruleset (e.g. fedora) used by default.")
+@click.option('--ruleset-file', '-f', type=click.File(mode='r'),
+              help="Path to a file with the ruleset used by default.")
+@click.option('--debug', default=False, is_flag=True,
+              help="Enable debugging mode (debugging logs, full tracebacks).")
+@click.option('--verbose', '-v', is_flag=True,
+              help="Verbose mode.")
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=1, show_default=True,
+              help="Number of checks running in parallel.")
+@click.option('--cache', is_flag=True,
+              help="Reuse the results of unchanged images and dockerfiles "
+                   "from the previous runs.")
+@click.option('--cache-dir', type=click.Path(file_okay=False), envvar='COLIN_CACHE_DIR',
+              help="Directory of the result cache (default ~/.cache/colin).")
+@click.option('--host', type=click.STRING, default=DEFAULT_HOST, show_default=True,
+              help="Address to listen on.")
+@click.option('--port', type=click.IntRange(min=0), default=DEFAULT_PORT, show_default=True,
+              help="Port to listen on.")
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help="Listen on the Unix socket instead of the host/port.")
+@click.option('--timeout', type=click.FloatRange(min=0),
+              help="Seconds each check can run (0 means no limit), the checks running longer "
+                   "are stopped and reported as timed out "
+                   "(the ruleset can set timeouts of the checks).")
+@click.option('--budget', type=click.FloatRange(min=0),
+              help="Seconds all the checks of one request can run, the checks not finished "
+                   "in time are reported as timed out.")
+def serve(ruleset, ruleset_file, debug, verbose, jobs, cache, cache_dir, host, port,
+          socket_path, timeout, budget):
+    """
+    Keep the checks loaded and check the targets requested over HTTP.
+
+    POST /check with {"target": "<image/container/path>"} or {"dockerfile": "<content>"}
+    (optionally "ruleset_name", "ruleset" and "tags") responds with the results as json.
+    """
+    if ruleset and ruleset_file:
+        raise click.BadOptionUsage(
+            "Options '--ruleset' and '--file-ruleset' cannot be used together.")
+
+    try:
+        if not debug:
+            logging.basicConfig(stream=six.StringIO())
+
+        log_level = _get_log_level(debug=debug,
+                                   verbose=verbose)
+        # the http server is imported only for the serve command
+        from ..core.server import ColinService
+
+        service = ColinService(ruleset_name=ruleset,
+                               ruleset_file=ruleset_file,
+                               workers=jobs,
+                               cache=cache,
+                               cache_dir=cache_dir,
+                               logging_level=log_level,
+                               timeout=timeout,
+                               budget=budget)
+        server = service.create_server(host=host, port=port, socket_path=socket_path)
+        click.echo("Listening on {}.".format(
+            socket_path or "http://{}:{}".format(*server.server_address[:2])))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+    except Exception as ex:
+        logger.error("An error occurred: %r", ex)
+        if debug:
+            raise
+        else:
+            raise click.ClickException(str(ex))
+
+
 @click.command(name="list-checks",
                context_settings=CONTEXT_SETTINGS)
 @click.option('--ruleset', '-r', type=click.STRING, envvar='COLIN_RULESET',
@@ -175,8 +457,10 @@ def list_rulesets(debug):
 
 
 cli.add_command(check)
+cli.add_command(check_many)
 cli.add_command(list_checks)
 cli.add_command(list_rulesets)
+cli.add_command(serve)
 cli.set_default_command(check)
 
 
@@ -193,6 +477,61 @@ def _print_results(results, stat=False, verbose=False):
                                    output_function=click.secho)
 
 
+def _print_timings(results):
+    """
+    Prints the time spent in the phases of the run and in the checks, the most expensive first
+
+    :param results: CheckResults or BatchCheckResults instance
+    """
+    phase_timings = sorted(six.iteritems(results.phase_timings),
+                           key=lambda t: t[1], reverse=True)
+    click.echo("Phases (seconds):")
+    for phase, seconds in phase_timings:
+        click.echo("  {:>9.3f}  {}".format(seconds, phase))
+    click.echo("Checks (seconds, CPU seconds):")
+    for name, duration, cpu_time in results.check_timings:
+        click.echo("  {:>9.3f}  {:>9}  {}".format(
+            duration, "-" if cpu_time is None else "{:.3f}".format(cpu_time), name))
+
+
+def _read_targets(targets_file):
+    """
+    Read the targets from the file (one per line, empty lines and comments are skipped).
+
+    :param targets_file: file-like object
+    :return: list of str
+    """
+    targets = []
+    for line in targets_file:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            targets.append(line)
+    return targets
+
+
+def _expand_targets(targets, changed_only=False):
+    """
+    Replace the directories and glob patterns by the dockerfiles found there.
+
+    :param targets: list of str
+    :param changed_only: bool, keep only the existing dockerfiles
+                         (targets can be a list of changed files, e.g. from git)
+    :return: list of str
+    """
+    expanded = []
+    for target in targets:
+        dockerfiles = find_dockerfiles(target)
+        if dockerfiles is not None:
+            expanded += dockerfiles
+        elif not changed_only:
+            expanded.append(target)
+        elif os.path.isfile(target) and is_dockerfile_name(os.path.basename(target)):
+            expanded.append(target)
+        else:
+            logger.debug("Skipping '{}', it is not a dockerfile.".format(target))
+    return expanded
+
+
 def _print_checks(checks):
     if not checks:
         click.echo("No check found.")
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+asyncio API of colin (python 3.5+).
+
+Checks can implement `async def check(self, target)`, they run on the event loop.
+The synchronous checks and the blocking calls (finding the target, docker inspect,
+clean-up) run in a thread pool, so the checks of many targets overlap on one event loop.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import ResultCache
+from .check_runner import (_add_check_info, _get_error_result, _get_timed_out_result,
+                           _get_timeout, _probe_files, _run_check)
+from .observer import notify
+from .colin import _get_cache_key, _set_logging
+from ..utils.timing import timed
+from .result import BatchCheckResults, CheckResults
+from .ruleset.ruleset import Ruleset
+from .target import Target, TargetType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+
+
+async def run_async(target, tags=None, ruleset_name=None, ruleset_file=None,
+                    ruleset=None, logging_level=logging.WARNING,
+                    concurrency=DEFAULT_CONCURRENCY, cache=False, cache_dir=None, backend=None,
+                    timeout=None, budget=None, observers=None):
+    """
+    Runs the sanity checks for the target on the event loop.
+
+    :param target: see `colin.run`
+    :param tags: list of str (if not None, the checks will be filtered by tags.)
+    :param ruleset_name: str (e.g. fedora; if None, default would be used)
+    :param ruleset_file: fileobj instance holding ruleset configuration
+    :param ruleset: dict, content of a ruleset file
+    :param logging_level: logging level (default logging.WARNING)
+    :param concurrency: int, maximal number of checks (and blocking calls) running at once
+    :param cache: bool, reuse the results of an unchanged image/dockerfile from the previous runs
+    :param cache_dir: str, directory of the result cache (default ~/.cache/colin)
+    :param backend: DockerBackend instance to use for the image/container target
+    :param timeout: float, seconds each check can run (checks can set their own in the ruleset)
+    :param budget: float, seconds all the checks can run
+    :param observers: list of Observer instances notified about the checks and the docker calls
+    :return: CheckResults instance (with all the results obtained)
+    """
+    results = await run_many_async(targets=[target],
+                                   tags=tags,
+                                   ruleset_name=ruleset_name,
+                                   ruleset_file=ruleset_file,
+                                   ruleset=ruleset,
+                                   logging_level=logging_level,
+                                   concurrency=concurrency,
+                                   cache=cache,
+                                   cache_dir=cache_dir,
+                                   backend=backend,
+                                   timeout=timeout,
+                                   budget=budget,
+                                   observers=observers)
+    _, target_results = next(iter(results.results))
+    if isinstance(target_results, Exception):
+        raise target_results
+    return target_results
+
+
+async def run_many_async(targets, tags=None, ruleset_name=None, ruleset_file=None,
+                         ruleset=None, logging_level=logging.WARNING,
+                         concurrency=DEFAULT_CONCURRENCY, cache=False, cache_dir=None,
+                         backend=None, timeout=None, budget=None, observers=None):
+    """
+    Runs the sanity checks for multiple targets at once on the event loop,
+    the concurrency limit is shared by all of them.
+
+    :param targets: iterable of targets (see `colin.run` for the possible values)
+    :param tags: list of str (if not None, the checks will be filtered by tags.)
+    :param ruleset_name: str (e.g. fedora; if None, default would be used)
+    :param ruleset_file: fileobj instance holding ruleset configuration
+    :param ruleset: dict, content of a ruleset file
+    :param logging_level: logging level (default logging.WARNING)
+    :param concurrency: int, maximal number of checks (and blocking calls) running at once
+    :param cache: bool, reuse the results of an unchanged image/dockerfile from the previous runs
+    :param cache_dir: str, directory of the result cache (default ~/.cache/colin)
+    :param backend: DockerBackend instance to use for the image/container targets
+    :param timeout: float, seconds each check can run (checks can set their own in the ruleset)
+    :param budget: float, seconds the checks of all the targets can run
+    :param observers: list of Observer instances notified about the checks and the docker calls
+    :return: BatchCheckResults instance (with all the results obtained)
+    """
+    _set_logging(level=logging_level)
+    timings = {}
+    with timed(timings, "ruleset"):
+        ruleset = Ruleset(ruleset_name=ruleset_name,
+                          ruleset_file=ruleset_file,
+                          ruleset=ruleset)
+    runner = _AsyncRunner(ruleset=ruleset,
+                          tags=tags,
+                          logging_level=logging_level,
+                          concurrency=concurrency,
+                          result_cache=ResultCache(directory=cache_dir) if cache else None,
+                          backend=backend,
+                          timeout=timeout,
+                          deadline=time.time() + budget if budget is not None else None,
+                          observers=observers)
+    try:
+        results = await asyncio.gather(*[runner.check_target(t) for t in targets])
+    finally:
+        runner.executor.shutdown(wait=False)
+    return BatchCheckResults(results=results, timings=timings)
+
+
+class _AsyncRunner(object):
+
+    def __init__(self, ruleset, tags, logging_level, concurrency, result_cache, backend,
+                 timeout=None, deadline=None, observers=None):
+        self.ruleset = ruleset
+        self.tags = tags
+        self.logging_level = logging_level
+        self.result_cache = result_cache
+        self.backend = backend
+        self.timeout = timeout
+        self.deadline = deadline
+        self.observers = observers
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self._checks_for_target_type = {}
+
+    async def _call_blocking(self, function, *args):
+        async with self.semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.executor, function, *args)
+
+    async def _clean_up(self, function):
+        """
+        Run the clean-up in its own thread, not in the executor (and not under the semaphore):
+        the threads of the executor can be taken by the hanging checks it has to stop.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def set_result(result, ex):
+            if not future.done():
+                if ex is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(ex)
+
+        def clean_up():
+            result, error = None, None
+            try:
+                result = function()
+            except Exception as ex:
+                error = ex
+            try:
+                loop.call_soon_threadsafe(set_result, result, error)
+            except RuntimeError:
+                # the loop is closed, nobody waits for the result
+                pass
+
+        # daemon thread, so the hanging clean-up does not block the exit of the interpreter
+        thread = threading.Thread(target=clean_up)
+        thread.daemon = True
+        thread.start()
+        return await future
+
+    def _get_checks(self, target_type):
+        if target_type not in self._checks_for_target_type:
+            self._checks_for_target_type[target_type] = self.ruleset.get_checks(
+                target_type=target_type, tags=self.tags)
+        return self._checks_for_target_type[target_type]
+
+    def _prepare_target(self, target):
+        target = Target(target=target, logging_level=self.logging_level, backend=self.backend,
+                        observers=self.observers)
+        cache_key = _get_cache_key(target=target,
+                                   ruleset=self.ruleset,
+                                   tags=self.tags,
+                                   result_cache=self.result_cache)
+        cached_results = self.result_cache.load(cache_key) if cache_key else None
+        return target, cache_key, cached_results
+
+    async def check_target(self, target):
+        """
+        :return: (target name, CheckResults instance or exception)
+        """
+        target_name = str(target)
+        try:
+            target, cache_key, cached_results = await self._call_blocking(
+                self._prepare_target, target)
+        except Exception as ex:
+            logger.warning("Target '{}' cannot be checked: {}".format(target_name, ex))
+            return target_name, ex
+        timings = dict(target.timings)
+        if cached_results is not None:
+            return target_name, CheckResults(results=cached_results, timings=timings)
+
+        with timed(timings, "check_loading"):
+            checks = self._get_checks(target.target_type)
+        try:
+            with timed(timings, "probe"):
+                await self._call_blocking(_probe_files, target, checks)
+            with timed(timings, "checks"):
+                results = await asyncio.gather(*[self._run_check(target, c) for c in checks])
+        finally:
+            with timed(timings, "cleanup"):
+                await self._clean_up(target.clean_up)
+            timings.update(target.timings)
+        if cache_key:
+            self.result_cache.save(cache_key, results)
+        return target_name, CheckResults(results=results, timings=timings)
+
+    async def _run_check(self, target, check):
+        notify(self.observers, "on_check_start", target=target, check=check)
+        result = await self._run_check_in_time(target, check)
+        notify(self.observers, "on_check_end", target=target, check=check, result=result)
+        return result
+
+    async def _run_check_in_time(self, target, check):
+        timeout = _get_timeout(check=check, timeout=self.timeout, deadline=self.deadline)
+        if timeout is not None and timeout <= 0 and self.deadline is not None:
+            return _get_timed_out_result(check=check, timeout=None)
+        try:
+            return await asyncio.wait_for(self._run_check_now(target, check), timeout)
+        except asyncio.TimeoutError:
+            # the blocking check keeps its thread, but its commands are killed with the container
+            await self._clean_up(target.retire_scratch_container)
+            return _get_timed_out_result(check=check, timeout=timeout)
+
+    async def _run_check_now(self, target, check):
+        scoped_to_stages = getattr(check, "stages", None) \
+            and target.target_type == TargetType.DOCKERFILE
+        if scoped_to_stages or not asyncio.iscoroutinefunction(check.check):
+            return await self._call_blocking(_run_check, target, check)
+
+        async with self.semaphore:
+            logger.debug("Checking {}".format(check.name))
+            # only the wall time, the CPU time of the event loop is shared by the checks
+            start = time.time()
+            try:
+                result = await check.check(target)
+            except Exception as ex:
+                result = _get_error_result(check=check, ex=ex)
+            result.duration = time.time() - start
+        return _add_check_info(result=result, check=check)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Persistent cache of the check results stored on the disk.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from .constant import ERROR, TIMEOUT
+from .result import CheckResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+
+def get_cache_directory():
+    """
+    Get the default directory for the cache: $XDG_CACHE_HOME/colin or ~/.cache/colin
+
+    :return: str
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"),
+                                                                  ".cache")
+    return os.path.join(cache_home, "colin")
+
+
+def get_cache_key(*parts):
+    """
+    Compute the key from the parts (they have to be json-serializable).
+
+    :return: str
+    """
+    serialized = json.dumps(parts, sort_keys=True)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class ResultCache(object):
+    """
+    Check results stored as json files, one per key.
+    The least recently used entries are removed when there are more than max_entries
+    or they take more than max_size bytes.
+    """
+
+    def __init__(self, directory=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_size=DEFAULT_MAX_SIZE):
+        """
+        :param directory: str, directory for the cache files (default: get_cache_directory())
+        :param max_entries: int, maximal number of cached results
+        :param max_size: int, maximal size of the cache files in bytes
+        """
+        self.directory = directory or get_cache_directory()
+        self.max_entries = max_entries
+        self.max_size = max_size
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def load(self, key):
+        """
+        Get the cached results.
+
+        :param key: str
+        :return: list of CheckResult instances or None if there is nothing cached
+        """
+        path = self._get_path(key)
+        try:
+            with open(path, "r") as fd:
+                results_json = json.load(fd)["results"]
+            # mark the entry as recently used
+            os.utime(path, None)
+        except (IOError, OSError, ValueError, KeyError) as ex:
+            logger.debug("No cached results for '{}': {}".format(key, ex))
+            return None
+        logger.debug("Using cached results for '{}'.".format(key))
+        return [_result_from_json(r) for r in results_json]
+
+    def save(self, key, results):
+        """
+        Store the results. Results containing an error or a timeout are not stored
+        since the problem can be only temporary.
+
+        :param key: str
+        :param results: list of CheckResult instances
+        """
+        if any(r.status in (ERROR, TIMEOUT) for r in results):
+            logger.debug("Results for '{}' contain an error, not caching them.".format(key))
+            return
+        results_json = []
+        for r in results:
+            result_json = r.json
+            result_json["tags"] = r.tags
+            result_json["check_type"] = r.check_type
+            results_json.append(result_json)
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump({"results": results_json}, tmp_file)
+            os.rename(tmp_path, self._get_path(key))
+        except (IOError, OSError) as ex:
+            logger.warning("Results cannot be cached: {}".format(ex))
+            return
+        self._evict()
+
+    def saving(self, key, results):
+        """
+        Pass the results through and store them once all of them are obtained.
+
+        :param key: str
+        :param results: iterable of CheckResult instances
+        :return: generator of CheckResult instances
+        """
+        obtained = []
+        for r in results:
+            obtained.append(r)
+            yield r
+        self.save(key, obtained)
+
+    def _evict(self):
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total_size = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_size > self.max_size):
+            _, size, path = entries.pop(0)
+            logger.debug("Removing the least recently used cache entry '{}'.".format(path))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+
+def _result_from_json(result_json):
+    result = CheckResult(ok=result_json["ok"],
+                         description=result_json["description"],
+                         message=result_json["message"],
+                         reference_url=result_json["reference_url"],
+                         check_name=result_json["name"],
+                         logs=result_json["logs"])
+    result.tags = result_json["tags"]
+    result.check_type = result_json["check_type"]
+    return result
@@ -14,28 +14,240 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import inspect
 import logging
+import threading
+import time
 import traceback
+from multiprocessing.pool import ThreadPool
 
-from .result import CheckResults, FailedCheckResult
+from ..utils.timing import thread_cpu_time, timed
+from .observer import notify
+from .result import CheckResult, CheckResults, FailedCheckResult, TimedOutCheckResult
+from .target import TargetType
 
 logger = logging.getLogger(__name__)
 
 
-def go_through_checks(target, checks):
+def go_through_checks(target, checks, workers=1, result_cache=None, cache_key=None,
+                      timeout=None, budget=None, timings=None, observers=None):
+    """
+    Run the checks against the target.
+
+    :param target: Target instance
+    :param checks: list of check instances
+    :param workers: int, number of checks running at the same time (1 means sequentially)
+    :param result_cache: ResultCache instance, if set, the results are cached under cache_key
+    :param cache_key: str, key of the results in the cache
+    :param timeout: float, seconds each check can run (if the check does not set its own)
+    :param budget: float, seconds all the checks can run,
+                   the checks not finished in time end with the timeout status
+    :param timings: dict (name of the phase -> seconds) of the phases before the checks
+                    (e.g. ruleset, check_loading), the phases of the run are added to it
+    :param observers: list of Observer instances notified about the checks
+    :return: CheckResults instance
+    """
+    timings = {} if timings is None else timings
+    # target resolution (see Target.timings)
+    timings.update(getattr(target, "timings", {}))
+    if result_cache and cache_key:
+        cached_results = result_cache.load(cache_key)
+        if cached_results is not None:
+            logger.debug("Using cached results.")
+            return CheckResults(results=cached_results, timings=timings)
+
     logger.debug("Going through checks.")
     results = _result_generator(target=target,
-                                checks=checks)
-    return CheckResults(results=results)
+                                checks=checks,
+                                workers=workers,
+                                timeout=timeout,
+                                budget=budget,
+                                timings=timings,
+                                observers=observers)
+    if result_cache and cache_key:
+        results = result_cache.saving(cache_key, results)
+    return CheckResults(results=results, timings=timings)
+
+
+def _result_generator(target, checks, workers=1, timeout=None, budget=None, timings=None,
+                      observers=None):
+    timings = {} if timings is None else timings
+    deadline = time.time() + budget if budget is not None else None
+    try:
+        with timed(timings, "probe"):
+            _probe_files(target=target, checks=checks)
+        start = time.time()
+        for result in _run_checks(target=target, checks=checks, workers=workers,
+                                  timeout=timeout, deadline=deadline, observers=observers):
+            yield result
+        timings["checks"] = time.time() - start
+    finally:
+        with timed(timings, "cleanup"):
+            target.clean_up()
+        # the image inspect and the scratch container happen during the checks
+        timings.update(getattr(target, "timings", {}))
 
 
-def _result_generator(target, checks):
-    for check in checks:
-        logger.debug("Checking {}".format(check.name))
+def _probe_files(target, checks):
+    """
+    Find out the presence of the files needed by all the checks at once
+    (one command for the container instead of one per file).
+    The answers are cached by the target, the checks only pick them up.
+    """
+    paths = [p for check in checks for p in getattr(check, "probed_files", [])]
+    if not paths:
+        return
+    logger.debug("Probing files for the checks: {}".format(paths))
+    try:
+        target.files_present(paths)
+    except Exception as ex:
+        # the checks will try again and report the error
+        logger.info("Files cannot be probed in advance: {}".format(ex))
+
+
+def _run_checks(target, checks, workers, timeout=None, deadline=None, observers=None):
+    def run(check):
+        notify(observers, "on_check_start", target=target, check=check)
+        result = _run_check_in_time(target=target, check=check,
+                                    timeout=timeout, deadline=deadline)
+        notify(observers, "on_check_end", target=target, check=check, result=result)
+        return result
+
+    if workers and workers > 1 and len(checks) > 1:
+        workers = min(workers, len(checks))
+        logger.debug("Running checks in {} threads.".format(workers))
+        pool = ThreadPool(processes=workers)
         try:
-            yield check.check(target)
-        except Exception as ex:
-            tb = traceback.format_exc()
-            logger.warning(
-                "There was an error while performing check: {}".format(tb))
-            yield FailedCheckResult(check, logs=[str(ex)])
+            # imap keeps the order of the checks, so the results are deterministic
+            for result in pool.imap(run, checks):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for check in checks:
+            yield run(check)
+
+
+def _run_check_in_time(target, check, timeout=None, deadline=None):
+    """
+    Run the check, but do not wait for it longer than its timeout
+    (or the rest of the run budget).
+
+    A check which did not finish in time is reported with the timeout status
+    and the scratch container of the target is retired: the next checks get a new one,
+    the checks running in the old one are not disturbed and the hanging command
+    is killed with it by the clean-up at the end of the run.
+    """
+    timeout = _get_timeout(check=check, timeout=timeout, deadline=deadline)
+    if timeout is None:
+        return _run_check(target=target, check=check)
+    if timeout <= 0 and deadline is not None:
+        logger.debug("Run budget exhausted, skipping {}.".format(check.name))
+        return _get_timed_out_result(check=check, timeout=None)
+
+    results = []
+    # daemon thread, so the hanging check does not block the exit of the interpreter
+    thread = threading.Thread(target=lambda: results.append(_run_check(target=target,
+                                                                       check=check)))
+    thread.daemon = True
+    thread.start()
+    thread.join(timeout)
+    if results:
+        return results[0]
+
+    target.retire_scratch_container()
+    return _get_timed_out_result(check=check, timeout=timeout)
+
+
+def _get_timeout(check, timeout=None, deadline=None):
+    """
+    Get the seconds the check can run.
+
+    :param check: check instance, its own timeout overrides the default one
+    :param timeout: float, default timeout of the checks (None or 0 means no limit)
+    :param deadline: float, time (as time.time()) of the end of the run budget
+    :return: float (<= 0 only if the budget is exhausted) or None (no limit)
+    """
+    timeout = getattr(check, "timeout", None) or timeout or None
+    if deadline is not None:
+        remaining = deadline - time.time()
+        timeout = min(timeout, remaining) if timeout else remaining
+    return timeout
+
+
+def _get_timed_out_result(check, timeout):
+    result = TimedOutCheckResult(check)
+    if timeout is None:
+        result.logs = ["Run budget exhausted."]
+        result.duration = 0.0
+    else:
+        logger.warning("Check {} timed out after {:g} s.".format(check.name, timeout))
+        result.logs = ["Check timed out after {:g} s.".format(timeout)]
+        result.duration = timeout
+    return _add_check_info(result=result, check=check)
+
+
+def _run_check(target, check):
+    logger.debug("Checking {}".format(check.name))
+    start = time.time()
+    # every check runs in a single thread, so the CPU time of the thread is the one of the check
+    cpu_start = thread_cpu_time()
+    try:
+        if getattr(check, "stages", None) and target.target_type == TargetType.DOCKERFILE:
+            result = _check_stages(target=target, check=check)
+        else:
+            result = _call_check(target=target, check=check)
+    except Exception as ex:
+        result = _get_error_result(check=check, ex=ex)
+    result.duration = time.time() - start
+    if cpu_start is not None:
+        result.cpu_time = thread_cpu_time() - cpu_start
+    return _add_check_info(result=result, check=check)
+
+
+def _call_check(target, check):
+    result = check.check(target)
+    if hasattr(inspect, "isawaitable") and inspect.isawaitable(result):
+        # async check (see colin.core.aio) run by the synchronous runner
+        import asyncio
+
+        loop = asyncio.new_event_loop()
+        try:
+            result = loop.run_until_complete(result)
+        finally:
+            loop.close()
+    return result
+
+
+def _get_error_result(check, ex):
+    tb = traceback.format_exc()
+    logger.warning(
+        "There was an error while performing check: {}".format(tb))
+    return FailedCheckResult(check, logs=[str(ex)])
+
+
+def _add_check_info(result, check):
+    result.tags = check.tags
+    result.check_type = check.check_type
+    return result
+
+
+def _check_stages(target, check):
+    """
+    Evaluate the check for each of its stages of the dockerfile target
+    and merge the results (the check passes if it passes for all the stages).
+    """
+    logs = []
+    passed = True
+    for stage_target in target.get_stage_targets(check.stages):
+        stage_result = _call_check(target=stage_target, check=check)
+        passed = passed and bool(stage_result.ok)
+        logs.append("{}: {}".format(stage_target, stage_result.status))
+        logs += ["{}: {}".format(stage_target, log) for log in stage_result.logs]
+    return CheckResult(ok=passed,
+                       description=check.description,
+                       message=check.message,
+                       reference_url=check.reference_url,
+                       check_name=check.name,
+                       logs=logs)
@@ -20,6 +20,8 @@ from six import iteritems
 
 class AbstractCheck(object):
     name = None
+    # seconds the check can run, None means the default of the run (can be set in the ruleset)
+    timeout = None
 
     def __init__(self, message, description, reference_url, tags):
         self.message = message
@@ -30,6 +32,18 @@ class AbstractCheck(object):
     def check(self, target):
         pass
 
+    @property
+    def check_type(self):
+        """
+        Name of the generic colin check this check is based on (e.g. LabelAbstractCheck)
+
+        :return: str
+        """
+        core_checks_module = AbstractCheck.__module__.rsplit(".", 1)[0]
+        for kls in type(self).__mro__:
+            if kls.__module__.startswith(core_checks_module):
+                return kls.__name__
+
     def __str__(self):
         return "{}\n" \
                "   -> {}\n" \
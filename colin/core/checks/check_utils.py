@@ -1,4 +1,32 @@
 import re
+import threading
+from collections import OrderedDict
+
+# attributes of the checks holding regular expressions
+REGEX_ATTRIBUTES = ("value_regex", "expected_regex")
+REGEX_CACHE_SIZE = 1024
+
+_regex_cache = OrderedDict()
+_regex_cache_lock = threading.Lock()
+
+
+def compile_regex(pattern):
+    """
+    Compile the regular expression, the compiled patterns are cached
+    (the least recently used ones are dropped when the cache is full).
+
+    :param pattern: str
+    :return: compiled regular expression
+    :raises re.error: if the pattern is not valid
+    """
+    with _regex_cache_lock:
+        compiled = _regex_cache.pop(pattern, None)
+        if compiled is None:
+            compiled = re.compile(pattern)
+            if len(_regex_cache) >= REGEX_CACHE_SIZE:
+                _regex_cache.popitem(last=False)
+        _regex_cache[pattern] = compiled
+        return compiled
 
 
 def check_label(labels, required, value_regex, target_labels):
@@ -18,7 +46,7 @@ def check_label(labels, required, value_regex, target_labels):
         if required and not value_regex:
             return True
         elif value_regex:
-            pattern = re.compile(value_regex)
+            pattern = compile_regex(value_regex)
             present_labels = set(labels) & set(target_labels)
             for l in present_labels:
                 if not bool(pattern.match(target_labels[l])):
@@ -13,12 +13,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
-import re
-
-from conu import ConuException
 
 from ..exceptions import ColinException
 from ..result import CheckResult, FailedCheckResult
+from .check_utils import compile_regex
 from .containers import ContainerAbstractCheck
 from .images import ImageAbstractCheck
 
@@ -35,11 +33,12 @@ class CmdAbstractCheck(ContainerAbstractCheck, ImageAbstractCheck):
         self.substring = substring
 
     def check(self, target):
+        from conu import ConuException
 
         try:
             output = target.get_output(cmd=self.cmd)
         except ConuException as ex:
-            if str(ex).endswith("exit code 126") or str(ex).endswith("error: 127"):
+            if str(ex).endswith(("exit code 126", "exit code 127", "error: 127")):
                 return CheckResult(ok=False,
                                    description=self.description,
                                    message=self.message,
@@ -76,7 +75,7 @@ class CmdAbstractCheck(ContainerAbstractCheck, ImageAbstractCheck):
                 passed = False
 
         if self.expected_regex is not None:
-            pattern = re.compile(self.expected_regex)
+            pattern = compile_regex(self.expected_regex)
             if pattern.match(output):
                 logs.append("ok: Output of the command '{}' match the regex '{}'." \
                             .format(self.cmd, self.expected_regex))
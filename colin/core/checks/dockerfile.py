@@ -14,11 +14,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 import logging
-import re
 
 from ..result import CheckResult
 from .abstract_check import AbstractCheck
-from .check_utils import check_label
+from .check_utils import check_label, compile_regex
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +35,10 @@ def get_instructions_from_dockerfile_parse(dfp, instruction):
 
 
 class DockerfileAbstractCheck(AbstractCheck):
-    pass
+
+    # stages of the dockerfile the check is evaluated for ("final", "all" or list of names),
+    # set by the ruleset; None means the whole dockerfile at once
+    stages = None
 
 
 class InstructionAbstractCheck(DockerfileAbstractCheck):
@@ -50,8 +52,8 @@ class InstructionAbstractCheck(DockerfileAbstractCheck):
         self.required = required
 
     def check(self, target):
-        instructions = get_instructions_from_dockerfile_parse(target.instance, self.instruction)
-        pattern = re.compile(self.value_regex)
+        instructions = target.dockerfile.get_instructions(self.instruction)
+        pattern = compile_regex(self.value_regex)
         logs = []
         passed = True
         for inst in instructions:
@@ -82,7 +84,7 @@ class InstructionCountAbstractCheck(DockerfileAbstractCheck):
         self.max_count = max_count
 
     def check(self, target):
-        count = len(get_instructions_from_dockerfile_parse(target.instance, self.instruction))
+        count = len(target.dockerfile.get_instructions(self.instruction))
 
         log = "Found {} occurrences of the {} instruction. Needed: min {} | max {}" \
             .format(count,
@@ -115,7 +117,7 @@ class DockerfileLabelAbstractCheck(DockerfileAbstractCheck):
         self.value_regex = value_regex
 
     def check(self, target):
-        labels = target.instance.labels
+        labels = target.dockerfile.labels
         passed = check_label(labels=self.label,
                              required=self.required,
                              value_regex=self.value_regex,
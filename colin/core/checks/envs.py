@@ -14,10 +14,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import re
-
 from ..result import CheckResult
-from ..target import inspect_object
+from .check_utils import compile_regex
 from .containers import ContainerAbstractCheck
 from .images import ImageAbstractCheck
 
@@ -33,23 +31,15 @@ class EnvCheck(ContainerAbstractCheck, ImageAbstractCheck):
         self.value_regex = value_regex
 
     def check(self, target):
-        env_vars = inspect_object(target.instance)["Config"]["Env"]
-
-        env_vars_dict = {}
-        if env_vars:
-            for key_value in env_vars:
-                key, value = key_value.split("=")
-                env_vars_dict[key] = value
-            present = self.env_var in env_vars_dict
-        else:
-            present = False
+        env_vars_dict = target.metadata.env
+        present = self.env_var in env_vars_dict
 
         if present:
 
             if self.required and not self.value_regex:
                 passed = True
             elif self.value_regex:
-                pattern = re.compile(self.value_regex)
+                pattern = compile_regex(self.value_regex)
                 passed = bool(pattern.match(env_vars_dict[self.env_var]))
             else:
                 passed = False
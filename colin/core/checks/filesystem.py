@@ -15,9 +15,6 @@
 #
 import logging
 
-from conu import DockerRunBuilder
-from conu.exceptions import ConuException
-
 from colin.core.target import TargetType
 from ..exceptions import ColinException
 from ..result import CheckResult
@@ -39,16 +36,8 @@ class FileCheck(ContainerAbstractCheck, ImageAbstractCheck):
 
     def check(self, target):
         passed = self.all_must_be_present
-        cleanup = False
-
-        if target.target_type is TargetType.IMAGE:
-            drb = DockerRunBuilder(command=["/bin/sleep", "infinity"],
-                                   additional_opts=["--entrypoint="])
-            cont = target.instance.run_via_binary(run_command_instance=drb)
-            cleanup = True
-        elif target.target_type is TargetType.CONTAINER:
-            cont = target.instance
-        else:
+
+        if target.target_type not in (TargetType.IMAGE, TargetType.CONTAINER):
             return CheckResult(ok=False,
                                description=self.description,
                                message=self.message,
@@ -57,32 +46,32 @@ class FileCheck(ContainerAbstractCheck, ImageAbstractCheck):
                                logs=["Unsupported target, this check can "
                                      "process only containers and images"])
         logs = []
-        try:
-            for f in self.files:
-                cmd = ["/bin/ls", "-1", f]
-                try:
-                    f_present = cont.execute(cmd)
-                    logs.append("File '{}' is {}present."
-                                .format(f, "" if f_present else "not "))
-                except ConuException as ex:
-                    logger.info("File %s is not present, ex: %s", f, ex)
-                    f_present = False
-                    logs.append("File {} is not present.".format(f))
-                if self.all_must_be_present:
-                    passed = f_present and passed
-                else:
-                    passed = f_present or passed
-
-            return CheckResult(ok=passed,
-                               description=self.description,
-                               message=self.message,
-                               reference_url=self.reference_url,
-                               check_name=self.name,
-                               logs=logs)
-        finally:
-            if cleanup:
-                cont.stop()
-                cont.delete()
+        presence = target.files_present(self.files)
+        for f in self.files:
+            f_present = presence[f]
+            logs.append("File '{}' is {}present."
+                        .format(f, "" if f_present else "not "))
+            if self.all_must_be_present:
+                passed = f_present and passed
+            else:
+                passed = f_present or passed
+
+        return CheckResult(ok=passed,
+                           description=self.description,
+                           message=self.message,
+                           reference_url=self.reference_url,
+                           check_name=self.name,
+                           logs=logs)
+
+    @property
+    def probed_files(self):
+        """
+        Files whose presence the check needs, the runner probes them in advance
+        for all the checks together.
+
+        :return: list of str
+        """
+        return self.files
 
 
 class FileSystemCheck(ContainerAbstractCheck, ImageAbstractCheck):
@@ -94,31 +83,42 @@ class FileSystemCheck(ContainerAbstractCheck, ImageAbstractCheck):
         self.all_must_be_present = all_must_be_present
 
     def check(self, target):
+        index = target.filesystem_index
+        if index is not None:
+            return self._check_files(index)
         try:
             with target.instance.mount() as fs:
-                passed = self.all_must_be_present
-
-                logs = []
-                for f in self.files:
-                    try:
-                        f_present = fs.file_is_present(f)
-                        logs.append("File '{}' is {}present."
-                                    .format(f, "" if f_present else "not "))
-                    except IOError as ex:
-                        f_present = False
-                        logs.append("Error: {}".format(str(ex)))
-
-                    if self.all_must_be_present:
-                        passed = f_present and passed
-                    else:
-                        passed = f_present or passed
-
-                return CheckResult(ok=passed,
-                                   description=self.description,
-                                   message=self.message,
-                                   reference_url=self.reference_url,
-                                   check_name=self.name,
-                                   logs=logs)
+                return self._check_files(fs)
         except Exception as ex:
             raise ColinException("There was an error while operating on filesystem of {}: {}"
                                  .format(target.instance, str(ex)))
+
+    def _check_files(self, fs):
+        """
+        :param fs: object with the file_is_present(path) method
+                   (FilesystemIndex or mounted filesystem)
+        :return: CheckResult
+        """
+        passed = self.all_must_be_present
+
+        logs = []
+        for f in self.files:
+            try:
+                f_present = fs.file_is_present(f)
+                logs.append("File '{}' is {}present."
+                            .format(f, "" if f_present else "not "))
+            except IOError as ex:
+                f_present = False
+                logs.append("Error: {}".format(str(ex)))
+
+            if self.all_must_be_present:
+                passed = f_present and passed
+            else:
+                passed = f_present or passed
+
+        return CheckResult(ok=passed,
+                           description=self.description,
+                           message=self.message,
+                           reference_url=self.reference_url,
+                           check_name=self.name,
+                           logs=logs)
@@ -13,15 +13,24 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import logging
+import threading
+import weakref
+
 from ..result import CheckResult
-from .check_utils import check_label
+from .check_utils import check_label, compile_regex
 from .containers import ContainerAbstractCheck
 from .dockerfile import DockerfileAbstractCheck
 from .images import ImageAbstractCheck
 
+logger = logging.getLogger(__name__)
+
 
 class LabelAbstractCheck(ContainerAbstractCheck, ImageAbstractCheck, DockerfileAbstractCheck):
 
+    # set by the ruleset, evaluates all the label checks together
+    label_rule_engine = None
+
     def __init__(self, message, description, reference_url, tags, labels, required,
                  value_regex=None):
         super(LabelAbstractCheck, self) \
@@ -31,10 +40,13 @@ class LabelAbstractCheck(ContainerAbstractCheck, ImageAbstractCheck, DockerfileA
         self.value_regex = value_regex
 
     def check(self, target):
-        passed = check_label(labels=self.labels,
-                             required=self.required,
-                             value_regex=self.value_regex,
-                             target_labels=target.labels)
+        if self.label_rule_engine is not None:
+            passed = self.label_rule_engine.is_passing(check=self, target=target)
+        else:
+            passed = check_label(labels=self.labels,
+                                 required=self.required,
+                                 value_regex=self.value_regex,
+                                 target_labels=target.labels)
 
         return CheckResult(ok=passed,
                            description=self.description,
@@ -47,6 +59,9 @@ class LabelAbstractCheck(ContainerAbstractCheck, ImageAbstractCheck, DockerfileA
 class DeprecatedLabelAbstractCheck(ContainerAbstractCheck, ImageAbstractCheck,
                                    DockerfileAbstractCheck):
 
+    # set by the ruleset, evaluates all the label checks together
+    label_rule_engine = None
+
     def __init__(self, message, description, reference_url, tags, old_label, new_label):
         super(DeprecatedLabelAbstractCheck, self) \
             .__init__(message, description, reference_url, tags)
@@ -54,10 +69,13 @@ class DeprecatedLabelAbstractCheck(ContainerAbstractCheck, ImageAbstractCheck,
         self.new_label = new_label
 
     def check(self, target):
-        labels = target.labels
-        old_present = labels is not None and self.old_label in labels
+        if self.label_rule_engine is not None:
+            passed = self.label_rule_engine.is_passing(check=self, target=target)
+        else:
+            labels = target.labels
+            old_present = labels is not None and self.old_label in labels
 
-        passed = (not old_present) or (self.new_label in labels)
+            passed = (not old_present) or (self.new_label in labels)
 
         return CheckResult(ok=passed,
                            description=self.description,
@@ -65,3 +83,93 @@ class DeprecatedLabelAbstractCheck(ContainerAbstractCheck, ImageAbstractCheck,
                            reference_url=self.reference_url,
                            check_name=self.name,
                            logs=[])
+
+
+class LabelRuleEngine(object):
+    """
+    Evaluates all the label checks of the ruleset in one pass through the labels of the target.
+
+    The regular expressions are compiled once and the rules are indexed by the label names.
+    Results are computed on the first request for the target and kept while the target lives.
+    The semantics is the same as the one of check_label and DeprecatedLabelAbstractCheck.
+    """
+
+    def __init__(self, checks):
+        """
+        :param checks: list of LabelAbstractCheck and DeprecatedLabelAbstractCheck instances
+        """
+        self._label_rules = []  # (check, required, compiled regex or None)
+        self._deprecated_rules = []  # (check, old_label, new_label)
+        self._rules_by_label = {}  # label name -> indexes to the self._label_rules
+        for check in checks:
+            if isinstance(check, LabelAbstractCheck):
+                pattern = compile_regex(check.value_regex) if check.value_regex else None
+                for label in set(check.labels):
+                    self._rules_by_label.setdefault(label, []).append(len(self._label_rules))
+                self._label_rules.append((check, check.required, pattern))
+            elif isinstance(check, DeprecatedLabelAbstractCheck):
+                self._deprecated_rules.append((check, check.old_label, check.new_label))
+        self._results = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._label_rules) + len(self._deprecated_rules)
+
+    def is_passing(self, check, target):
+        """
+        :param check: one of the checks given to the engine
+        :param target: Target instance
+        :return: bool
+        """
+        with self._lock:
+            results = self._results.get(target)
+            if results is None:
+                results = self.evaluate(target.labels)
+                self._results[target] = results
+        return results[id(check)]
+
+    def evaluate(self, target_labels):
+        """
+        Evaluate all the checks.
+
+        :param target_labels: dict (label name -> value) or None
+        :return: dict (id of the check -> bool)
+        """
+        target_labels = target_labels or {}
+
+        present_values = [[] for _ in self._label_rules]
+        for label, value in target_labels.items():
+            for rule_index in self._rules_by_label.get(label, ()):
+                present_values[rule_index].append(value)
+
+        results = {}
+        for (check, required, pattern), values in zip(self._label_rules, present_values):
+            if not values:
+                passed = not required
+            elif pattern:
+                passed = all(pattern.match(v) for v in values)
+            else:
+                passed = bool(required)
+            results[id(check)] = passed
+
+        for check, old_label, new_label in self._deprecated_rules:
+            results[id(check)] = old_label not in target_labels or new_label in target_labels
+        return results
+
+
+def attach_label_rule_engine(checks):
+    """
+    Let one LabelRuleEngine evaluate all the label checks from the list.
+
+    :param checks: list of check instances
+    :return: LabelRuleEngine instance or None if there is no label check
+    """
+    label_checks = [c for c in checks
+                    if isinstance(c, (LabelAbstractCheck, DeprecatedLabelAbstractCheck))]
+    if not label_checks:
+        return None
+    engine = LabelRuleEngine(label_checks)
+    for check in label_checks:
+        check.label_rule_engine = engine
+    logger.debug("Label rule engine with {} checks created.".format(len(engine)))
+    return engine
@@ -15,16 +15,25 @@
 #
 
 import logging
+import time
+from multiprocessing import Pool
 
+from ..utils.timing import timed
+from ..version import __version__
+from .cache import ResultCache, get_cache_key
 from .check_runner import go_through_checks
+from .constant import PASSED
+from .exceptions import ColinException
+from .result import BatchCheckResults, CheckResults
 from .ruleset.ruleset import Ruleset
-from .target import Target
+from .target import Target, TargetType
 
 logger = logging.getLogger(__name__)
 
 
 def run(target, tags=None, ruleset_name=None, ruleset_file=None,
-        ruleset=None, logging_level=logging.WARNING):
+        ruleset=None, logging_level=logging.WARNING, workers=1, cache=False, cache_dir=None,
+        backend=None, timeout=None, budget=None, observers=None):
     """
     Runs the sanity checks for the target.
 
@@ -32,27 +41,244 @@ def run(target, tags=None, ruleset_name=None, ruleset_file=None,
                     or Image/Container (name of the container/image or Image/Container
                                         instance from conu)
                     or path or file-like object for dockerfile
+                    or path to `docker save` tarball or OCI image layout (file or directory)
     :param tags: list of str (if not None, the checks will be filtered by tags.)
     :param ruleset_name: str (e.g. fedora; if None, default would be used)
     :param ruleset_file: fileobj instance holding ruleset configuration
     :param ruleset: dict, content of a ruleset file
     :param logging_level: logging level (default logging.WARNING)
+    :param workers: int, number of checks running in parallel (default 1 = sequentially)
+    :param cache: bool, reuse the results of an unchanged image/dockerfile from the previous runs
+    :param cache_dir: str, directory of the result cache (default ~/.cache/colin)
+    :param backend: DockerBackend instance to use for the image/container target
+                    (default is the one shared by all the runs in the process)
+    :param timeout: float, seconds each check can run (checks can set their own in the ruleset)
+    :param budget: float, seconds all the checks can run,
+                   the checks not finished in time end with the timeout status
+    :param observers: list of Observer instances (see colin.core.observer)
+                      notified about the checks and the docker calls
     :return: Results instance
     """
     _set_logging(level=logging_level)
     logger.debug("Checking started.")
+    timings = {}
     target = Target(target=target,
-                    logging_level=logging_level)
-    checks_to_run = _get_checks(target_type=target.target_type,
-                                tags=tags,
-                                ruleset_name=ruleset_name,
-                                ruleset_file=ruleset_file,
-                                ruleset=ruleset)
+                    logging_level=logging_level,
+                    backend=backend,
+                    observers=observers)
+    with timed(timings, "ruleset"):
+        ruleset = Ruleset(ruleset_name=ruleset_name,
+                          ruleset_file=ruleset_file,
+                          ruleset=ruleset)
+    with timed(timings, "check_loading"):
+        checks_to_run = ruleset.get_checks(target_type=target.target_type,
+                                           tags=tags)
+    result_cache = ResultCache(directory=cache_dir) if cache else None
     result = go_through_checks(target=target,
-                               checks=checks_to_run)
+                               checks=checks_to_run,
+                               workers=workers,
+                               result_cache=result_cache,
+                               cache_key=_get_cache_key(target=target,
+                                                        ruleset=ruleset,
+                                                        tags=tags,
+                                                        result_cache=result_cache),
+                               timeout=timeout,
+                               budget=budget,
+                               timings=timings,
+                               observers=observers)
     return result
 
 
+def run_many(targets, tags=None, ruleset_name=None, ruleset_file=None,
+             ruleset=None, logging_level=logging.WARNING, workers=1, cache=False,
+             cache_dir=None, processes=1, changed_only=False, backend=None, timeout=None,
+             budget=None, observers=None):
+    """
+    Runs the sanity checks for multiple targets.
+    The ruleset is loaded and the checks are found only once for all of them
+    (once per process if the targets are checked in multiple processes).
+
+    :param targets: iterable of targets (see `run` for the possible values)
+    :param tags: list of str (if not None, the checks will be filtered by tags.)
+    :param ruleset_name: str (e.g. fedora; if None, default would be used)
+    :param ruleset_file: fileobj instance holding ruleset configuration
+    :param ruleset: dict, content of a ruleset file
+    :param logging_level: logging level (default logging.WARNING)
+    :param workers: int, number of checks running in parallel (default 1 = sequentially)
+    :param cache: bool, reuse the results of an unchanged image/dockerfile from the previous runs
+    :param cache_dir: str, directory of the result cache (default ~/.cache/colin)
+    :param processes: int, number of targets checked in parallel processes
+                      (default 1 = in this process), targets have to be str then
+    :param changed_only: bool, skip the targets whose results are cached and passed
+                         (e.g. unchanged dockerfiles), the cached failures are still reported,
+                         implies cache=True
+    :param backend: DockerBackend instance to use for the image/container targets
+                    (default is the one shared in the process, each process has its own)
+    :param timeout: float, seconds each check can run (checks can set their own in the ruleset)
+    :param budget: float, seconds the checks of all the targets can run,
+                   the checks not finished in time end with the timeout status
+    :param observers: list of Observer instances (see colin.core.observer)
+                      notified about the checks and the docker calls,
+                      cannot be used with multiple processes
+    :return: BatchCheckResults instance
+    """
+    if observers and processes and processes > 1:
+        raise ColinException("Observers cannot be used with multiple processes.")
+    _set_logging(level=logging_level)
+    logger.debug("Checking of multiple targets started.")
+    timings = {}
+    with timed(timings, "ruleset"):
+        ruleset = Ruleset(ruleset_name=ruleset_name,
+                          ruleset_file=ruleset_file,
+                          ruleset=ruleset)
+    cache = cache or changed_only
+    deadline = time.time() + budget if budget is not None else None
+    if processes and processes > 1:
+        results = _parallel_batch_result_generator(targets=targets,
+                                                   processes=processes,
+                                                   ruleset=ruleset,
+                                                   tags=tags,
+                                                   logging_level=logging_level,
+                                                   workers=workers,
+                                                   cache=cache,
+                                                   cache_dir=cache_dir,
+                                                   changed_only=changed_only,
+                                                   timeout=timeout,
+                                                   deadline=deadline)
+        return BatchCheckResults(results=results, timings=timings)
+
+    result_cache = ResultCache(directory=cache_dir) if cache else None
+    results = _batch_result_generator(targets=targets,
+                                      ruleset=ruleset,
+                                      tags=tags,
+                                      logging_level=logging_level,
+                                      workers=workers,
+                                      result_cache=result_cache,
+                                      changed_only=changed_only,
+                                      backend=backend,
+                                      timeout=timeout,
+                                      deadline=deadline,
+                                      observers=observers)
+    return BatchCheckResults(results=results, timings=timings)
+
+
+def _batch_result_generator(targets, ruleset, tags, logging_level, workers, result_cache,
+                            changed_only=False, checks_for_target_type=None, backend=None,
+                            timeout=None, deadline=None, observers=None):
+    if checks_for_target_type is None:
+        checks_for_target_type = {}
+    for target in targets:
+        target_name = str(target)
+        try:
+            target = Target(target=target,
+                            logging_level=logging_level,
+                            backend=backend,
+                            observers=observers)
+            target_type = target.target_type
+        except Exception as ex:
+            logger.warning("Target '{}' cannot be checked: {}".format(target_name, ex))
+            yield target_name, ex
+            continue
+
+        cache_key = _get_cache_key(target=target,
+                                   ruleset=ruleset,
+                                   tags=tags,
+                                   result_cache=result_cache)
+        if changed_only and cache_key:
+            cached_results = result_cache.load(cache_key)
+            if cached_results is not None:
+                if all(r.status == PASSED for r in cached_results):
+                    logger.debug("Target '{}' has not changed, skipping it.".format(target_name))
+                    continue
+                # the known failures do not disappear just because the target has not changed
+                logger.debug("Target '{}' has not changed, reporting the cached results.".format(
+                    target_name))
+                yield target_name, CheckResults(results=cached_results)
+                continue
+
+        timings = {}
+        if target_type not in checks_for_target_type:
+            # the checks are loaded for the first target of the type only
+            with timed(timings, "check_loading"):
+                checks_for_target_type[target_type] = ruleset.get_checks(
+                    target_type=target_type, tags=tags)
+        result = go_through_checks(target=target,
+                                   checks=checks_for_target_type[target_type],
+                                   workers=workers,
+                                   result_cache=result_cache,
+                                   cache_key=cache_key,
+                                   timeout=timeout,
+                                   # the budget is shared by all the targets
+                                   budget=deadline - time.time() if deadline is not None else None,
+                                   timings=timings,
+                                   observers=observers)
+        yield target_name, result
+        # finish the checks (and clean up the target) before going to the next target
+        result.results.consume()
+
+
+def _parallel_batch_result_generator(targets, processes, ruleset, tags, logging_level, workers,
+                                     cache, cache_dir, changed_only, timeout=None, deadline=None):
+    targets = list(targets)
+    processes = min(processes, len(targets)) or 1
+    logger.debug("Checking the targets in {} processes.".format(processes))
+    pool = Pool(processes=processes,
+                initializer=_init_process,
+                initargs=(ruleset.ruleset_struct.d, tags, logging_level, workers, cache,
+                          cache_dir, changed_only, timeout, deadline))
+    try:
+        # imap keeps the order of the targets
+        for target_name, results, timings in pool.imap(_check_target_in_process, targets):
+            if results is None:
+                # skipped, not changed
+                continue
+            if isinstance(results, list):
+                results = CheckResults(results=results, timings=timings)
+            yield target_name, results
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+# state of the process checking the targets for _parallel_batch_result_generator
+_process_state = {}
+
+
+def _init_process(ruleset_dict, tags, logging_level, workers, cache, cache_dir, changed_only,
+                  timeout=None, deadline=None):
+    _process_state.update(ruleset=Ruleset(ruleset=ruleset_dict),
+                          tags=tags,
+                          logging_level=logging_level,
+                          workers=workers,
+                          result_cache=ResultCache(directory=cache_dir) if cache else None,
+                          changed_only=changed_only,
+                          timeout=timeout,
+                          deadline=deadline,
+                          # the checks are found only once in the process
+                          checks_for_target_type={})
+
+
+def _check_target_in_process(target):
+    """
+    Check the target in the process of the pool.
+
+    :return: (target name, list of results or exception or None if the target was skipped,
+              timings of the target)
+    """
+    checked = next(_batch_result_generator(targets=[target], **_process_state), None)
+    if checked is None:
+        return str(target), None, None
+    target_name, results = checked
+    if isinstance(results, Exception):
+        # not all the exceptions can be pickled
+        return target_name, ColinException(str(results)), None
+    try:
+        return target_name, list(results.results), results.timings
+    except Exception as ex:
+        return target_name, ColinException(str(ex)), None
+
+
 def get_checks(target_type=None, tags=None, ruleset_name=None,
                ruleset_file=None, ruleset=None, logging_level=logging.WARNING):
     """
@@ -77,6 +303,32 @@ def get_checks(target_type=None, tags=None, ruleset_name=None,
     )
 
 
+def _get_cache_key(target, ruleset, tags, result_cache):
+    """
+    Get the key of the results in the cache.
+    Only images and dockerfiles are cached: the results depend only on their content
+    (image ID or digest of the dockerfile content).
+
+    :return: str or None if the results should not be cached
+    """
+    if result_cache is None:
+        return None
+    if target.target_type == TargetType.IMAGE:
+        content_id = target.metadata.id
+    elif target.target_type == TargetType.DOCKERFILE:
+        content_id = target.dockerfile.digest
+    else:
+        return None
+    if not content_id:
+        return None
+    return get_cache_key(content_id,
+                         ruleset.digest,
+                         sorted(tags or []),
+                         target.target_type.name,
+                         __version__,
+                         ruleset.check_loader.code_digest)
+
+
 def _get_checks(target_type, tags=None,
                 ruleset_name=None, ruleset_file=None, ruleset=None):
     ruleset = Ruleset(ruleset_name=ruleset_name,
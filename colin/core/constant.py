@@ -17,19 +17,27 @@
 RULESET_DIRECTORY_NAME = "rulesets"
 RULESET_DIRECTORY = "share/colin/" + RULESET_DIRECTORY_NAME
 JSON = ".json"
+CHECKS_MANIFEST = "manifest" + JSON
 
 PASSED = "PASS"
 FAILED = "FAIL"
 ERROR = "ERROR"
+TIMEOUT = "TIMEOUT"
 
 COLOURS = {
     PASSED: "green",
     FAILED: "red",
-    ERROR: "red"
+    ERROR: "red",
+    TIMEOUT: "red"
 }
 
 OUTPUT_CHARS = {
     PASSED: ".",
     FAILED: "x",
-    ERROR: "#"
+    ERROR: "#",
+    TIMEOUT: "T"
 }
+
+# address of `colin serve`
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8317
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Discovery of the dockerfiles in directories (e.g. in a monorepo).
+"""
+
+import fnmatch
+import glob
+import logging
+import os
+
+import six
+
+from .image_archive import ImageArchive
+
+logger = logging.getLogger(__name__)
+
+DOCKERFILE_PATTERNS = ("Dockerfile*", "Containerfile*")
+
+
+def is_dockerfile_name(file_name):
+    """
+    :param file_name: str, base name of the file
+    :return: bool
+    """
+    return any(fnmatch.fnmatch(file_name, p) for p in DOCKERFILE_PATTERNS)
+
+
+def find_dockerfiles(path):
+    """
+    Find the dockerfiles for the directory or glob pattern.
+
+    Directories are searched recursively (hidden directories are skipped)
+    for Dockerfile* and Containerfile* files, only these files are taken
+    from the files matched by the pattern as well.
+    The directory has to be given as a path (e.g. `./fedora`, not `fedora`),
+    bare names are left for the images and containers.
+
+    :param path: str, directory or glob pattern
+    :return: sorted list of paths or None if the path is neither a directory nor a pattern
+    """
+    if os.path.isdir(path) and _is_explicit_path(path):
+        if ImageArchive.is_image_archive(path):
+            # OCI image layout is a directory as well
+            return None
+        paths = [path]
+    elif glob.has_magic(path):
+        paths = glob.glob(path, recursive=True) if six.PY3 else glob.glob(path)
+    else:
+        return None
+
+    dockerfiles = set()
+    for p in paths:
+        if os.path.isdir(p):
+            dockerfiles.update(_walk_directory(p))
+        elif os.path.isfile(p) and is_dockerfile_name(os.path.basename(p)):
+            dockerfiles.add(p)
+    logger.debug("Found {} dockerfiles for '{}'.".format(len(dockerfiles), path))
+    return sorted(dockerfiles)
+
+
+def _is_explicit_path(path):
+    return path.startswith(".") or os.sep in path or (os.altsep and os.altsep in path)
+
+
+def _walk_directory(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for f in files:
+            if is_dockerfile_name(f):
+                yield os.path.join(root, f)
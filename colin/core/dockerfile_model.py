@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import logging
+
+from dockerfile_parse.parser import image_from
+from dockerfile_parse.util import WordSplitter, get_key_val_dictionary
+
+from .exceptions import ColinException
+
+logger = logging.getLogger(__name__)
+
+
+class DockerfileStage(object):
+    """
+    One stage of the Dockerfile: FROM instruction and the instructions up to the next FROM.
+    """
+
+    def __init__(self, index, name, baseimage, instructions, labels, envs, args,
+                 base_stage=None):
+        """
+        :param index: int, position of the stage in the Dockerfile
+        :param name: str or None, name from the `FROM ... AS name`
+        :param baseimage: str or None
+        :param instructions: tuple of instruction dicts (FROM included)
+        :param labels: dict, labels of the stage, including the ones of the base stage
+                       (with ARG/ENV substituted)
+        :param envs: dict, ENV variables of the stage, including the ones of the base stage
+                     (with ARG/ENV substituted)
+        :param args: dict, ARG values of the stage
+        :param base_stage: DockerfileStage, if the stage is built from the previous stage
+        """
+        self.index = index
+        self.name = name
+        self.baseimage = baseimage
+        self.instructions = instructions
+        self.labels = labels
+        self.envs = envs
+        self.args = args
+        self.base_stage = base_stage
+
+    def __str__(self):
+        return self.name or str(self.index)
+
+    def get_instructions(self, instruction):
+        """
+        :param instruction: str, e.g. "RUN"
+        :return: tuple of instruction dicts
+        """
+        return tuple(i for i in self.instructions if i["instruction"] == instruction)
+
+
+class DockerfileModel(object):
+    """
+    Dockerfile parsed once and indexed for the checks.
+
+    The model is read-only, all the checks of the target share it.
+    The digest of the content identifies the model (e.g. for caching of the results).
+    Instructions are dicts as in DockerfileParser.structure
+    (instruction, startline, endline, content, value).
+    """
+
+    def __init__(self, dockerfile_parser):
+        """
+        :param dockerfile_parser: DockerfileParser instance
+        """
+        content = dockerfile_parser.content
+        self.digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        structure = dockerfile_parser.structure
+        contexts = dockerfile_parser.context_structure
+
+        self.instructions = tuple(structure)
+        self._instructions_by_type = {}
+        for instruction in self.instructions:
+            self._instructions_by_type.setdefault(instruction["instruction"], []) \
+                .append(instruction)
+        self._instructions_by_type = {k: tuple(v)
+                                      for k, v in self._instructions_by_type.items()}
+
+        self.stages = tuple(_get_stages(structure, contexts,
+                                        env_replace=dockerfile_parser.env_replace))
+        final_stage = self.stages[-1] if self.stages else None
+        self.baseimage = final_stage.baseimage if final_stage else None
+        self.base_stage = final_stage.base_stage if final_stage else None
+        self.labels = final_stage.labels if final_stage else {}
+        self.envs = final_stage.envs if final_stage else {}
+        logger.debug("Dockerfile model with {} instructions in {} stages created."
+                     .format(len(self.instructions), len(self.stages)))
+
+    def get_instructions(self, instruction):
+        """
+        Get all the instructions of the given type (from all the stages).
+
+        :param instruction: str, e.g. "RUN"
+        :return: tuple of instruction dicts
+        """
+        return self._instructions_by_type.get(instruction, ())
+
+    @property
+    def is_multistage(self):
+        return len(self.stages) > 1
+
+    def get_stages(self, selector):
+        """
+        Get the stages selected in the ruleset.
+
+        :param selector: "final", "all" or list of stage names
+        :return: tuple of DockerfileStage instances
+        """
+        if selector == "final":
+            return self.stages[-1:]
+        if selector == "all":
+            return self.stages
+        stages_by_name = {s.name.lower(): s for s in self.stages if s.name}
+        missing = [n for n in selector if n.lower() not in stages_by_name]
+        if missing:
+            raise ColinException("Stages not found in the dockerfile: {}"
+                                 .format(", ".join(missing)))
+        return tuple(stages_by_name[n.lower()] for n in selector)
+
+
+def _get_stages(structure, contexts, env_replace=True):
+    """
+    Split the instructions to the stages.
+
+    :param structure: DockerfileParser.structure
+    :param contexts: DockerfileParser.context_structure (Context for each instruction)
+    :param env_replace: bool, DockerfileParser.env_replace
+    :return: generator of DockerfileStage instances
+    """
+    top_args = {}
+    stages_by_name = {}
+    starts = []
+    for i, (instruction, context) in enumerate(zip(structure, contexts)):
+        if instruction["instruction"] == "FROM":
+            starts.append(i)
+        elif not starts:
+            top_args = context.args
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(structure)
+        image, name = image_from(structure[start]["value"])
+        if image is not None:
+            image = WordSplitter(image, args=top_args).dequote()
+        last_context = contexts[end - 1]
+        # stage names are case-insensitive
+        base_stage = stages_by_name.get((image or "").lower())
+        if base_stage is None:
+            labels, envs = dict(last_context.labels), dict(last_context.envs)
+        else:
+            labels, envs = _get_inherited_labels_and_envs(structure, contexts, start, end,
+                                                          base_stage=base_stage,
+                                                          env_replace=env_replace)
+        stage = DockerfileStage(index=index,
+                                name=name,
+                                baseimage=image,
+                                instructions=tuple(structure[start:end]),
+                                labels=labels,
+                                envs=envs,
+                                args=dict(last_context.args),
+                                base_stage=base_stage)
+        if name:
+            stages_by_name[name.lower()] = stage
+        yield stage
+
+
+def _get_inherited_labels_and_envs(structure, contexts, start, end, base_stage, env_replace):
+    """
+    Get the labels and ENV variables of the stage built from the previous stage.
+
+    The contexts of the parser start every stage from scratch, so the LABEL and ENV
+    instructions of the stage are evaluated again with the ENV variables of the base stage.
+    ARG values are not inherited, they are scoped to the stage where they are defined.
+
+    :return: (dict of labels, dict of ENV variables)
+    """
+    labels = dict(base_stage.labels)
+    envs = dict(base_stage.envs)
+    for i in range(start + 1, end):
+        instruction = structure[i]["instruction"]
+        if instruction not in ("ENV", "LABEL"):
+            continue
+        values = get_key_val_dictionary(instruction_value=structure[i]["value"],
+                                        env_replace=env_replace,
+                                        args=contexts[i - 1].args,
+                                        envs=envs)
+        if instruction == "ENV":
+            envs.update(values)
+        else:
+            labels.update(values)
+    return labels, envs
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Index of the merged filesystem of the image layers,
+the filesystem checks use it instead of running a container.
+"""
+
+import logging
+import posixpath
+import stat
+
+logger = logging.getLogger(__name__)
+
+WHITEOUT_PREFIX = ".wh."
+OPAQUE_WHITEOUT = ".wh..wh..opq"
+MAX_SYMLINKS = 40
+
+
+class FileInfo(object):
+    """
+    Information about a file in the image.
+    """
+
+    def __init__(self, path, mode, uid, gid, size, linkname=None):
+        self.path = path
+        self.mode = mode
+        self.uid = uid
+        self.gid = gid
+        self.size = size
+        self.linkname = linkname
+
+    @property
+    def is_dir(self):
+        return stat.S_ISDIR(self.mode)
+
+    @property
+    def is_symlink(self):
+        return stat.S_ISLNK(self.mode)
+
+    def __str__(self):
+        return "{} ({:o} {}:{} {}B)".format(self.path, self.mode, self.uid, self.gid, self.size)
+
+
+def _normalize(path):
+    return posixpath.normpath(posixpath.join("/", path))
+
+
+def _get_mode(member):
+    if member.isdir():
+        file_type = stat.S_IFDIR
+    elif member.issym():
+        file_type = stat.S_IFLNK
+    elif member.isfile() or member.islnk():
+        file_type = stat.S_IFREG
+    elif member.ischr():
+        file_type = stat.S_IFCHR
+    elif member.isblk():
+        file_type = stat.S_IFBLK
+    elif member.isfifo():
+        file_type = stat.S_IFIFO
+    else:
+        file_type = 0
+    return file_type | member.mode
+
+
+class FilesystemIndex(object):
+    """
+    Files of the image: path -> FileInfo, built from the layer tarballs (whiteouts are honoured).
+    """
+
+    def __init__(self):
+        self._files = {}
+        # directory -> set of paths directly in it, so the subtrees are removed without a scan
+        self._children = {}
+
+    @classmethod
+    def from_layers(cls, layers):
+        """
+        Build the index from the layers.
+
+        :param layers: iterable of TarFile instances, from the bottom layer
+        :return: FilesystemIndex instance
+        """
+        index = cls()
+        for layer in layers:
+            index.add_layer(layer)
+        index._add_parent_directories()
+        logger.debug("Filesystem index with {} files created.".format(len(index._files)))
+        return index
+
+    def add_layer(self, layer):
+        """
+        Put the layer on top of the files in the index.
+
+        :param layer: TarFile instance (can be open in the stream mode)
+        """
+        whiteouts = []
+        opaque_directories = []
+        files = []
+        for member in layer:
+            path = _normalize(member.name)
+            directory, name = posixpath.split(path)
+            if name == OPAQUE_WHITEOUT:
+                opaque_directories.append(directory)
+            elif name.startswith(WHITEOUT_PREFIX):
+                whiteouts.append(posixpath.join(directory, name[len(WHITEOUT_PREFIX):]))
+            else:
+                linkname = member.linkname or None
+                if member.islnk():
+                    # hard links point to other file in the layer, both have the same info
+                    linkname = None
+                files.append(FileInfo(path=path, mode=_get_mode(member), uid=member.uid,
+                                      gid=member.gid, size=member.size, linkname=linkname))
+
+        # whiteouts hide only the files from the lower layers
+        for directory in opaque_directories:
+            self._remove_tree(directory, keep_directory=True)
+        for path in whiteouts:
+            self._remove_tree(path)
+        for file_info in files:
+            self._add(file_info)
+
+    def _add(self, file_info):
+        self._files[file_info.path] = file_info
+        # link also the parent directories missing in the layers
+        child, parent = file_info.path, posixpath.dirname(file_info.path)
+        while parent != child:
+            children = self._children.setdefault(parent, set())
+            if child in children:
+                break
+            children.add(child)
+            child, parent = parent, posixpath.dirname(parent)
+
+    def _remove_tree(self, path, keep_directory=False):
+        if not keep_directory:
+            self._files.pop(path, None)
+            self._children.get(posixpath.dirname(path), set()).discard(path)
+        # the paths under the directory are known from the children, even the implicit ones
+        to_remove = list(self._children.pop(path, ()))
+        while to_remove:
+            p = to_remove.pop()
+            self._files.pop(p, None)
+            to_remove.extend(self._children.pop(p, ()))
+
+    def _add_parent_directories(self):
+        # layers do not have to contain all the parent directories
+        for path in list(self._files):
+            parent = posixpath.dirname(path)
+            while parent not in self._files:
+                self._add(FileInfo(path=parent, mode=stat.S_IFDIR | 0o755,
+                                   uid=0, gid=0, size=0))
+                parent = posixpath.dirname(parent)
+
+    def __len__(self):
+        return len(self._files)
+
+    def _resolve(self, path, follow_symlinks, symlinks=0):
+        """
+        Resolve the symlinks in the path.
+
+        :return: FileInfo or None if the file does not exist (or there are too many symlinks)
+        """
+        if symlinks > MAX_SYMLINKS:
+            return None
+        resolved = "/"
+        components = [c for c in _normalize(path).split("/") if c]
+        for i, component in enumerate(components):
+            current = posixpath.join(resolved, component)
+            file_info = self._files.get(current)
+            if file_info is None:
+                return None
+            last = i == len(components) - 1
+            if file_info.is_symlink and (follow_symlinks or not last):
+                link_target = _normalize(posixpath.join(resolved, file_info.linkname))
+                rest = components[i + 1:]
+                return self._resolve(posixpath.join(link_target, *rest),
+                                     follow_symlinks=follow_symlinks,
+                                     symlinks=symlinks + 1)
+            resolved = current
+        return self._files.get(resolved)
+
+    def get(self, path, follow_symlinks=True):
+        """
+        Get the information about the file.
+
+        :param path: str, absolute path in the image
+        :param follow_symlinks: bool, if False, symlink itself is returned for the last component
+        :return: FileInfo or None if the file is not present
+        """
+        return self._resolve(path, follow_symlinks=follow_symlinks)
+
+    def file_is_present(self, path):
+        """
+        Check the presence the same way as the probe in the container: a symlink
+        is present even if its target is not.
+
+        :param path: str, absolute path in the image
+        :return: bool
+        """
+        return self.get(path, follow_symlinks=False) is not None
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Images stored in files: `docker save` tarballs and OCI image layouts (directory or tarball).
+They can be checked without the docker daemon.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tarfile
+from contextlib import closing
+
+from .exceptions import ColinException
+
+logger = logging.getLogger(__name__)
+
+DOCKER_MANIFEST = "manifest.json"
+OCI_INDEX = "index.json"
+OCI_LAYOUT = "oci-layout"
+
+
+class ImageArchive(object):
+    """
+    Image stored in a `docker save` tarball or in an OCI image layout.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str, path to the tarball or to the directory
+        """
+        self.path = path
+        self._tar = None
+        self._config_path = None
+        self._layer_paths = None
+        self._config_data = None
+        self.repo_tags = []
+        self._read_manifest()
+
+    @staticmethod
+    def is_image_archive(path):
+        """
+        Is the path a `docker save` tarball or an OCI image layout?
+
+        :param path: str
+        :return: bool
+        """
+        if os.path.isdir(path):
+            return os.path.isfile(os.path.join(path, DOCKER_MANIFEST)) or \
+                os.path.isfile(os.path.join(path, OCI_LAYOUT))
+        if not os.path.isfile(path) or not tarfile.is_tarfile(path):
+            return False
+        with tarfile.open(path) as tar:
+            names = tar.getnames()
+        return DOCKER_MANIFEST in names or OCI_LAYOUT in names
+
+    def __str__(self):
+        return "Image archive '{}'".format(self.path)
+
+    def _open(self, name):
+        """
+        Open the file from the archive.
+
+        :param name: str, path relative to the root of the archive
+        :return: file-like object
+        """
+        if os.path.isdir(self.path):
+            return open(os.path.join(self.path, name), "rb")
+        if self._tar is None:
+            self._tar = tarfile.open(self.path)
+        try:
+            return self._tar.extractfile(name)
+        except KeyError:
+            raise ColinException("File '{}' not found in {}.".format(name, self))
+
+    def _read_json(self, name):
+        with closing(self._open(name)) as fd:
+            return json.loads(fd.read().decode("utf-8"))
+
+    def _read_manifest(self):
+        try:
+            # `docker save` provides the manifest.json even in the OCI format
+            if self._exists(DOCKER_MANIFEST):
+                manifest = self._read_json(DOCKER_MANIFEST)[0]
+                self._config_path = manifest["Config"]
+                self._layer_paths = manifest["Layers"]
+                self.repo_tags = manifest.get("RepoTags") or []
+            else:
+                manifest = self._read_json(OCI_INDEX)
+                # image index can point to another index, we take the first image
+                while "manifests" in manifest:
+                    manifest = self._read_json(_blob_path(manifest["manifests"][0]["digest"]))
+                self._config_path = _blob_path(manifest["config"]["digest"])
+                self._layer_paths = [_blob_path(l["digest"]) for l in manifest["layers"]]
+        except ColinException:
+            raise
+        except Exception as ex:
+            raise ColinException("Cannot read the image from {}: {}".format(self, ex))
+        logger.debug("Image with {} layers found in {}.".format(len(self._layer_paths), self))
+
+    def _exists(self, name):
+        if os.path.isdir(self.path):
+            return os.path.isfile(os.path.join(self.path, name))
+        try:
+            self._open(name).close()
+            return True
+        except ColinException:
+            return False
+
+    @property
+    def _config(self):
+        if self._config_data is None:
+            with closing(self._open(self._config_path)) as fd:
+                self._config_data = fd.read()
+        return self._config_data
+
+    def get_id(self):
+        """
+        ID of the image: digest of its configuration (the same as docker uses).
+
+        :return: str
+        """
+        return "sha256:" + hashlib.sha256(self._config).hexdigest()
+
+    def inspect(self, refresh=True):
+        """
+        Metadata of the image in the format of `docker inspect`.
+
+        :param refresh: bool, ignored, the archive does not change
+        :return: dict
+        """
+        config = json.loads(self._config.decode("utf-8"))
+        return {
+            "Id": self.get_id(),
+            "RepoTags": self.repo_tags,
+            "Architecture": config.get("architecture"),
+            "Os": config.get("os"),
+            "Config": config.get("config") or {},
+        }
+
+    def layers(self):
+        """
+        Layers of the image from the bottom one.
+
+        :return: generator of TarFile instances (open in the stream mode)
+        """
+        for layer_path in self._layer_paths:
+            logger.debug("Reading layer '{}'.".format(layer_path))
+            with closing(self._open(layer_path)) as fd:
+                # layers can be compressed, 'r|*' takes care of it
+                layer = tarfile.open(fileobj=fd, mode="r|*")
+                try:
+                    yield layer
+                finally:
+                    layer.close()
+
+
+def _blob_path(digest):
+    algorithm, hex_digest = digest.split(":", 1)
+    return "/".join(["blobs", algorithm, hex_digest])
@@ -18,16 +18,28 @@ This piece of code searches for python code on specific path and
 loads AbstractCheck classes from it.
 """
 
+import hashlib
 import inspect
+import json
 import logging
 import os
 import sys
+import threading
 import warnings
 
 import six
 
+from .checks.containers import ContainerAbstractCheck
+from .checks.dockerfile import DockerfileAbstractCheck
+from .checks.images import ImageAbstractCheck
+from .constant import CHECKS_MANIFEST
+
 logger = logging.getLogger(__name__)
 
+# process-wide registry of loaded check classes: path -> (mtime, list of check classes)
+_check_classes_cache = {}
+_check_classes_cache_lock = threading.Lock()
+
 
 def path_to_module(path, top_path):
     if top_path not in path:
@@ -78,15 +90,104 @@ def should_we_load(kls):
 
 
 def load_check_classes_from_file(path, top_path):
-    logger.debug("Getting check(s) from the file '{}'.".format(path))
-    m = _load_module(path, top_path)
+    """
+    Load the check classes from the file.
+    The classes are cached for the whole process, the file is loaded again only when
+    its modification time changes.
+
+    :param path: str, path to the python file
+    :param top_path: str, path on the pythonpath the module name is computed from
+    :return: list of check classes
+    """
+    mtime = os.path.getmtime(path)
+    with _check_classes_cache_lock:
+        cached = _check_classes_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            logger.debug("Using cached check(s) from the file '{}'.".format(path))
+            return list(cached[1])
+
+        logger.debug("Getting check(s) from the file '{}'.".format(path))
+        m = _load_module(path, top_path)
+
+        check_classes = []
+        for _, obj in inspect.getmembers(m, inspect.isclass):
+            if should_we_load(obj):
+                check_classes.append(obj)
+                logger.debug("Check class '{}' found.".format(obj.__name__))
+        _check_classes_cache[path] = (mtime, check_classes)
+        return list(check_classes)
+
+
+def _get_python_files(path):
+    """
+    Get all python files on the path.
+
+    :param path: str, path to a file or a dir
+    :return: list of str (sorted)
+    """
+    if os.path.isfile(path):
+        return [path]
+    python_files = []
+    for root, _, files in os.walk(path):
+        for fi in files:
+            if fi.endswith(".py"):
+                python_files.append(os.path.join(root, fi))
+    return sorted(python_files)
+
+
+def _get_file_digest(path):
+    with open(path, "rb") as fd:
+        return hashlib.sha256(fd.read()).hexdigest()
+
+
+def _get_target_types(kls):
+    target_types = []
+    for target_type, abstract_class in [("container", ContainerAbstractCheck),
+                                        ("dockerfile", DockerfileAbstractCheck),
+                                        ("image", ImageAbstractCheck)]:
+        if issubclass(kls, abstract_class):
+            target_types.append(target_type)
+    return target_types
+
+
+def generate_manifest(path, manifest_path=None):
+    """
+    Load all the checks on the path and save their manifest
+    (check name -> file and class, tags and target types) to the json file.
+
+    :param path: str, path to a dir where check classes are present
+    :param manifest_path: str, path to the manifest file (default: <path>/manifest.json)
+    :return: dict, the manifest
+    """
+    loader = CheckLoader(path)
+    manifest = {
+        "files": {},
+        "checks": {},
+    }
+    for file_path in _get_python_files(loader.path):
+        rel_path = os.path.relpath(file_path, loader.path)
+        manifest["files"][rel_path] = _get_file_digest(file_path)
+        for kls in load_check_classes_from_file(file_path, loader.top_py_path):
+            if kls.name is None or kls.name in manifest["checks"]:
+                continue
+            try:
+                tags = kls().tags
+            except Exception as ex:
+                logger.warning("Can't instantiate check {}: {}".format(kls.__name__, ex))
+                tags = []
+            manifest["checks"][kls.name] = {
+                "file": rel_path,
+                "class": kls.__name__,
+                "tags": tags,
+                "target_types": _get_target_types(kls),
+            }
 
-    check_classes = []
-    for _, obj in inspect.getmembers(m, inspect.isclass):
-        if should_we_load(obj):
-            check_classes.append(obj)
-            logger.debug("Check class '{}' found.".format(obj.__name__))
-    return check_classes
+    manifest_path = manifest_path or loader.manifest_path
+    logger.debug("Saving manifest with {} checks to '{}'.".format(len(manifest["checks"]),
+                                                                  manifest_path))
+    with open(manifest_path, "w") as fd:
+        json.dump(manifest, fd, indent=4, sort_keys=True)
+    return manifest
 
 
 class CheckLoader(object):
@@ -101,6 +202,7 @@ class CheckLoader(object):
         logger.debug("Will load checks from path '{}'.".format(path))
         self._check_classes = None
         self._mapping = None
+        self._manifest = None
         self.path = path
         for p in sys.path:
             if p in self.path:
@@ -114,17 +216,92 @@ class CheckLoader(object):
     def obtain_check_classes(self):
         """ find children of AbstractCheck class and return them as a list """
         check_classes = set()
-        if os.path.isfile(self.path):
-            return load_check_classes_from_file(self.path, self.top_py_path)
-        for root, _, files in os.walk(self.path):
-            for fi in files:
-                if fi.endswith(".pyc"):
-                    continue
-                path = os.path.join(root, fi)
-                check_classes = check_classes.union(set(
-                    load_check_classes_from_file(path, self.top_py_path)))
+        for path in _get_python_files(self.path):
+            check_classes = check_classes.union(set(
+                load_check_classes_from_file(path, self.top_py_path)))
         return list(check_classes)
 
+    @property
+    def code_digest(self):
+        """
+        Digest of the code of all the python files on the path.
+
+        :return: str
+        """
+        digest = hashlib.sha256()
+        for path in _get_python_files(self.path):
+            digest.update(os.path.relpath(path, self.path).encode("utf-8"))
+            digest.update(_get_file_digest(path).encode("utf-8"))
+        return digest.hexdigest()
+
+    @property
+    def manifest_path(self):
+        """ path to the manifest file generated by generate_manifest """
+        return os.path.join(self.path, CHECKS_MANIFEST)
+
+    @property
+    def manifest(self):
+        """
+        Manifest of the checks or None if it does not exist or it's not up to date
+        with the python files.
+
+        :return: dict or None
+        """
+        if self._manifest is None:
+            self._manifest = self._load_manifest() or {}
+        return self._manifest or None
+
+    def _load_manifest(self):
+        if not os.path.isdir(self.path) or not os.path.isfile(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, "r") as fd:
+                manifest = json.load(fd)
+            files = {os.path.relpath(p, self.path): _get_file_digest(p)
+                     for p in _get_python_files(self.path)}
+            if files != manifest["files"]:
+                logger.info("Manifest '{}' is stale, all the checks will be loaded."
+                            .format(self.manifest_path))
+                return None
+            return manifest
+        except Exception as ex:
+            logger.warning("Manifest '{}' cannot be loaded: {}".format(self.manifest_path, ex))
+            return None
+
+    def get_check_class(self, name):
+        """
+        Get the check class with the given name.
+        When the manifest is available, only the file with the check is loaded.
+
+        :param name: str, name of the check
+        :return: check class
+        :raises KeyError: when there is no such check
+        """
+        manifest = self.manifest
+        if manifest and name in manifest["checks"]:
+            check_info = manifest["checks"][name]
+            path = os.path.join(self.path, check_info["file"])
+            for kls in load_check_classes_from_file(path, self.top_py_path):
+                if kls.__name__ == check_info["class"]:
+                    return kls
+            logger.info("Check '{}' not found in the manifested file '{}'."
+                        .format(name, path))
+        return self.mapping[name]
+
+    def reload(self):
+        """
+        Drop the cached check classes for the path and load them again from the files.
+        """
+        with _check_classes_cache_lock:
+            for cached_path in list(_check_classes_cache):
+                if cached_path == self.path or \
+                        cached_path.startswith(os.path.join(self.path, "")):
+                    del _check_classes_cache[cached_path]
+        self._check_classes = None
+        self._mapping = None
+        self._manifest = None
+        return self.check_classes
+
     @property
     def check_classes(self):
         if self._check_classes is None:
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+class TargetMetadata(object):
+    """
+    Parsed metadata of the image/container (output of `docker inspect`).
+    """
+
+    def __init__(self, inspect_data):
+        """
+        :param inspect_data: dict, raw metadata from the docker inspect
+        """
+        self.inspect_data = inspect_data
+
+    @property
+    def id(self):
+        """
+        ID of the image/container (for images, it's the digest of the image configuration).
+
+        :return: str
+        """
+        return self.inspect_data.get("Id")
+
+    @property
+    def config(self):
+        """
+        Configuration of the image/container.
+
+        :return: dict
+        """
+        return self.inspect_data.get("Config") or {}
+
+    @property
+    def env(self):
+        """
+        Environment variables.
+
+        :return: dict (str -> str)
+        """
+        env_vars = {}
+        for key_value in self.config.get("Env") or []:
+            key, _, value = key_value.partition("=")
+            env_vars[key] = value
+        return env_vars
+
+    @property
+    def labels(self):
+        """
+        Labels of the image/container.
+
+        :return: dict (str -> str)
+        """
+        return self.config.get("Labels")
+
+    @property
+    def user(self):
+        """
+        User the processes run as.
+
+        :return: str or None
+        """
+        return self.config.get("User")
+
+    @property
+    def cmd(self):
+        """
+        :return: list of str or None
+        """
+        return self.config.get("Cmd")
+
+    @property
+    def entrypoint(self):
+        """
+        :return: list of str or None
+        """
+        return self.config.get("Entrypoint")
+
+    @property
+    def exposed_ports(self):
+        """
+        Exposed ports in the form '<port>/<protocol>'.
+
+        :return: list of str
+        """
+        return sorted((self.config.get("ExposedPorts") or {}).keys())
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Hooks around the check pipeline, e.g. for tracing or metrics.
+
+Pass instances of Observer subclasses to `colin.run` (or `run_many`, `go_through_checks`,
+`Target`), colin calls them from the threads running the checks,
+so the implementations have to be thread-safe.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import six
+
+logger = logging.getLogger(__name__)
+
+
+class Observer(object):
+    """
+    Base class of the observers, all the hooks do nothing by default.
+    """
+
+    def on_check_start(self, target, check):
+        """
+        The check is going to run.
+
+        :param target: Target instance
+        :param check: check instance
+        """
+
+    def on_check_end(self, target, check, result):
+        """
+        The check finished (or timed out).
+
+        :param target: Target instance
+        :param check: check instance
+        :param result: CheckResult instance, its duration and cpu_time are set
+        """
+
+    def on_docker_call(self, operation, duration, error=None):
+        """
+        The call of the docker daemon finished.
+
+        :param operation: str, e.g. lookup, inspect, container_start, exec, container_remove
+        :param duration: float, seconds
+        :param error: exception raised by the call or None
+        """
+
+
+def notify(observers, hook, **kwargs):
+    """
+    Call the hook of all the observers, their errors are logged and ignored.
+
+    :param observers: list of Observer instances (or None)
+    :param hook: str, name of the hook (e.g. on_check_start)
+    :param kwargs: arguments of the hook
+    """
+    for observer in observers or ():
+        try:
+            getattr(observer, hook)(**kwargs)
+        except Exception as ex:
+            logger.warning("Observer {!r} failed in {}: {!r}".format(observer, hook, ex))
+
+
+@contextmanager
+def observe_docker_call(observers, operation):
+    """
+    Measure the call of the docker daemon in the block and report it to the observers.
+
+    :param observers: list of Observer instances (or None)
+    :param operation: str, name of the call
+    """
+    if not observers:
+        yield
+        return
+    start = time.time()
+    error = None
+    try:
+        yield
+    except Exception as ex:
+        error = ex
+        raise
+    finally:
+        notify(observers, "on_docker_call",
+               operation=operation, duration=time.time() - start, error=error)
+
+
+# upper bounds of the histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class PrometheusExporter(Observer):
+    """
+    Collects counters and latency histograms of the checks and of the docker calls
+    and renders them in the Prometheus text format:
+
+    colin_checks_total{check,status}, colin_check_duration_seconds{check},
+    colin_docker_calls_total{operation}, colin_docker_call_errors_total{operation}
+    and colin_docker_call_duration_seconds{operation}.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: sorted tuple of floats, upper bounds of the histogram buckets
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._checks = {}
+        self._check_durations = {}
+        self._docker_calls = {}
+        self._docker_call_errors = {}
+        self._docker_call_durations = {}
+
+    def on_check_end(self, target, check, result):
+        with self._lock:
+            _increment(self._checks, (result.check_name, result.status))
+            if result.duration is not None:
+                self._observe(self._check_durations, result.check_name, result.duration)
+
+    def on_docker_call(self, operation, duration, error=None):
+        with self._lock:
+            _increment(self._docker_calls, operation)
+            if error is not None:
+                _increment(self._docker_call_errors, operation)
+            self._observe(self._docker_call_durations, operation, duration)
+
+    def _observe(self, histograms, key, value):
+        # has to be called with self._lock acquired
+        histogram = histograms.setdefault(key, {"buckets": [0] * len(self.buckets),
+                                                "sum": 0.0,
+                                                "count": 0})
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+    def render(self):
+        """
+        Get the metrics in the Prometheus text format.
+
+        :return: str
+        """
+        lines = []
+        with self._lock:
+            _render_counter(lines, "colin_checks_total", "Checks run by their status.",
+                            [({"check": c, "status": s}, n)
+                             for (c, s), n in sorted(six.iteritems(self._checks))])
+            self._render_histogram(lines, "colin_check_duration_seconds",
+                                   "Wall time of the checks.", "check", self._check_durations)
+            _render_counter(lines, "colin_docker_calls_total", "Calls of the docker daemon.",
+                            [({"operation": o}, n)
+                             for o, n in sorted(six.iteritems(self._docker_calls))])
+            _render_counter(lines, "colin_docker_call_errors_total",
+                            "Failed calls of the docker daemon.",
+                            [({"operation": o}, n)
+                             for o, n in sorted(six.iteritems(self._docker_call_errors))])
+            self._render_histogram(lines, "colin_docker_call_duration_seconds",
+                                   "Latency of the docker daemon calls.", "operation",
+                                   self._docker_call_durations)
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, lines, name, help_text, label, histograms):
+        lines.append("# HELP {} {}".format(name, help_text))
+        lines.append("# TYPE {} histogram".format(name))
+        for key, histogram in sorted(six.iteritems(histograms)):
+            labels = {label: key}
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                lines.append("{}_bucket{} {}".format(
+                    name, _format_labels(labels, le="{:g}".format(bound)), count))
+            lines.append("{}_bucket{} {}".format(
+                name, _format_labels(labels, le="+Inf"), histogram["count"]))
+            lines.append("{}_sum{} {!r}".format(name, _format_labels(labels), histogram["sum"]))
+            lines.append("{}_count{} {}".format(name, _format_labels(labels),
+                                                histogram["count"]))
+
+    def dump(self, path):
+        """
+        Write the metrics to the file (e.g. for the textfile collector of node_exporter).
+        The file is replaced atomically, so the collector never reads it half-written.
+
+        :param path: str
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                tmp_file.write(self.render())
+            os.rename(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+
+def _render_counter(lines, name, help_text, samples):
+    lines.append("# HELP {} {}".format(name, help_text))
+    lines.append("# TYPE {} counter".format(name))
+    for labels, value in samples:
+        lines.append("{}{} {}".format(name, _format_labels(labels), value))
+
+
+def _format_labels(labels, **additional_labels):
+    labels = dict(labels, **additional_labels)
+    return "{" + ",".join('{}="{}"'.format(k, _escape(labels[k])) for k in sorted(labels)) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _increment(counter, key, count=1):
+    counter.setdefault(key, 0)
+    counter[key] += count
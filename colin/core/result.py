@@ -19,7 +19,7 @@ import json
 import six
 
 from ..utils.caching_iterable import CachingIterable
-from .constant import (COLOURS, ERROR, FAILED, OUTPUT_CHARS, PASSED)
+from .constant import (COLOURS, ERROR, FAILED, OUTPUT_CHARS, PASSED, TIMEOUT)
 
 
 class CheckResult(object):
@@ -31,11 +31,36 @@ class CheckResult(object):
         self.reference_url = reference_url
         self.check_name = check_name
         self.logs = logs
+        # filled in by the check runner
+        self.tags = []
+        self.check_type = None
+        # wall and CPU time of the check in seconds (None if not measured, e.g. cached)
+        self.duration = None
+        self.cpu_time = None
 
     @property
     def status(self):
         return PASSED if self.ok else FAILED
 
+    @property
+    def json(self):
+        """
+        Get json representation of the result
+
+        :return: dict (str -> obj)
+        """
+        return {
+            'name': self.check_name,
+            'ok': self.ok,
+            'status': self.status,
+            'description': self.description,
+            'message': self.message,
+            'reference_url': self.reference_url,
+            'logs': self.logs,
+            'duration': self.duration,
+            'cpu_time': self.cpu_time,
+        }
+
     def __str__(self):
         return "{}:{}".format(self.status,
                               self.message)
@@ -53,8 +78,30 @@ class DockerfileCheckResult(CheckResult):
 
 class CheckResults(object):
 
-    def __init__(self, results):
+    def __init__(self, results, timings=None):
+        """
+        :param results: iterable of CheckResult instances
+        :param timings: dict (name of the phase -> seconds), e.g. ruleset, check_loading,
+                        target, inspect, checks, cleanup; filled in while the checks run
+        """
         self.results = CachingIterable(results)
+        self.timings = timings if timings is not None else {}
+        self._statistics = {}
+        self._tag_statistics = {}
+        self._check_type_statistics = {}
+        self.results.add_callback(self._count_result)
+
+    def _count_result(self, result):
+        _increment(self._statistics, result.status)
+        for tag in result.tags or []:
+            _increment(self._tag_statistics.setdefault(tag, {}), result.status)
+        if result.check_type:
+            _increment(self._check_type_statistics.setdefault(result.check_type, {}),
+                       result.status)
+
+    def _consume(self):
+        """ obtain all the results, the statistics are complete afterwards """
+        self.results.consume()
 
     @property
     def _dict_of_results(self):
@@ -67,16 +114,9 @@ class CheckResults(object):
 
         result_list = []
         for r in self.results:
-            result_list.append({
-                'name': r.check_name,
-                'ok': r.ok,
-                'status': r.status,
-                'description': r.description,
-                'message': r.message,
-                'reference_url': r.reference_url,
-                'logs': r.logs,
-            })
+            result_list.append(r.json)
         result_json["checks"] = result_list
+        result_json["timings"] = dict(self.timings)
         return result_json
 
     @property
@@ -93,6 +133,27 @@ class CheckResults(object):
                   fp=file,
                   indent=4)
 
+    def stream_json_lines_to_file(self, file, keep_results=True, **additional_fields):
+        """
+        Write every result to the file as a single line of json (JSON Lines)
+        as soon as the result is available.
+
+        :param file: file-like object
+        :param keep_results: bool, if False, the results are not kept in the memory,
+                             they can be then iterated only once (e.g. by the pretty output),
+                             the statistics are still available
+        :param additional_fields: fields added to every line
+        """
+        def write_line(result):
+            result_json = dict(additional_fields)
+            result_json.update(result.json)
+            file.write(json.dumps(result_json) + "\n")
+            file.flush()
+
+        self.results.add_callback(write_line)
+        if not keep_results:
+            self.results.stop_caching()
+
     @property
     def statistics(self):
         """
@@ -100,11 +161,52 @@ class CheckResults(object):
 
         :return: dict(str -> int)
         """
-        result = {}
-        for r in self.results:
-            result.setdefault(r.status, 0)
-            result[r.status] += 1
-        return result
+        self._consume()
+        return dict(self._statistics)
+
+    @property
+    def tag_statistics(self):
+        """
+        Get the dictionary with the count of the check-statuses for every tag
+
+        :return: dict(str -> dict(str -> int))
+        """
+        self._consume()
+        return {tag: dict(stat) for tag, stat in six.iteritems(self._tag_statistics)}
+
+    @property
+    def check_type_statistics(self):
+        """
+        Get the dictionary with the count of the check-statuses for every type of check
+        (e.g. LabelAbstractCheck)
+
+        :return: dict(str -> dict(str -> int))
+        """
+        self._consume()
+        return {check_type: dict(stat)
+                for check_type, stat in six.iteritems(self._check_type_statistics)}
+
+    @property
+    def phase_timings(self):
+        """
+        Get the seconds spent in the phases of the run (all the checks are obtained first)
+
+        :return: dict(str -> float)
+        """
+        self._consume()
+        return dict(self.timings)
+
+    @property
+    def check_timings(self):
+        """
+        Get the wall and CPU time of the checks, the most expensive first
+        (the checks without measured time, e.g. cached, are left out)
+
+        :return: list of (check name, seconds, CPU seconds or None)
+        """
+        timings = [(r.check_name, r.duration, r.cpu_time)
+                   for r in self.results if r.duration is not None]
+        return sorted(timings, key=lambda t: t[1], reverse=True)
 
     @property
     def ok(self):
@@ -112,9 +214,10 @@ class CheckResults(object):
         If the results ended without any error
 
 
-        :return: True, if there is no check which ends with error status
+        :return: True, if there is no check which ends with error (or timeout) status
         """
-        return ERROR not in self.statistics
+        statistics = self.statistics
+        return ERROR not in statistics and TIMEOUT not in statistics
 
     @property
     def fail(self):
@@ -181,10 +284,194 @@ class CheckResults(object):
         return pretty_output.result
 
 
+class BatchCheckResults(object):
+
+    def __init__(self, results, timings=None):
+        """
+        :param results: iterable of (target name, CheckResults instance) pairs,
+                        the exception is used instead of CheckResults
+                        when the target cannot be checked
+        :param timings: dict (name of the phase -> seconds) of the phases shared
+                        by all the targets (e.g. ruleset)
+        """
+        self.results = CachingIterable(results)
+        self.timings = timings if timings is not None else {}
+        self._statistics = None
+
+    @property
+    def _dict_of_results(self):
+        """
+        Get the dictionary representation of results
+
+        :return: dict (str -> list of dicts)
+        """
+        target_list = []
+        for target_name, target_results in self.results:
+            if isinstance(target_results, CheckResults):
+                target_list.append(dict(target=target_name,
+                                        **target_results._dict_of_results))
+            else:
+                target_list.append({
+                    'target': target_name,
+                    'error': str(target_results),
+                })
+        return {"targets": target_list,
+                "timings": dict(self.timings)}
+
+    @property
+    def json(self):
+        """
+        Get the json representation of results
+
+        :return: str
+        """
+        return json.dumps(self._dict_of_results, indent=4)
+
+    def save_json_to_file(self, file):
+        json.dump(obj=self._dict_of_results,
+                  fp=file,
+                  indent=4)
+
+    def stream_json_lines_to_file(self, file, keep_results=True):
+        """
+        Write every result to the file as a single line of json (JSON Lines)
+        as soon as the result is available. The name of the target is added to every line.
+
+        :param file: file-like object
+        :param keep_results: bool, if False, the results of the checks are not kept
+                             in the memory, they can be then iterated only once
+                             (e.g. by the pretty output), the statistics are still available
+        """
+        def stream_target(target_name_and_results):
+            target_name, target_results = target_name_and_results
+            if isinstance(target_results, CheckResults):
+                target_results.stream_json_lines_to_file(file, keep_results=keep_results,
+                                                         target=target_name)
+            else:
+                file.write(json.dumps({'target': target_name,
+                                       'error': str(target_results)}) + "\n")
+                file.flush()
+
+        self.results.add_callback(stream_target)
+
+    @property
+    def statistics(self):
+        """
+        Get the dictionary with the count of the check-statuses for all the targets
+        (target which cannot be checked counts as an error)
+
+        :return: dict(str -> int)
+        """
+        if self._statistics is None:
+            result = {}
+            for _, target_results in self.results:
+                if isinstance(target_results, CheckResults):
+                    for status, count in six.iteritems(target_results.statistics):
+                        _increment(result, status, count)
+                else:
+                    _increment(result, ERROR)
+            self._statistics = result
+        return dict(self._statistics)
+
+    @property
+    def phase_timings(self):
+        """
+        Get the seconds spent in the phases of the run, summed for all the targets
+
+        :return: dict(str -> float)
+        """
+        result = dict(self.timings)
+        for _, target_results in self.results:
+            if isinstance(target_results, CheckResults):
+                for phase, seconds in six.iteritems(target_results.phase_timings):
+                    _increment(result, phase, seconds)
+        return result
+
+    @property
+    def check_timings(self):
+        """
+        Get the wall and CPU time of the checks summed for all the targets,
+        the most expensive first
+
+        :return: list of (check name, seconds, CPU seconds or None)
+        """
+        durations = {}
+        cpu_times = {}
+        for _, target_results in self.results:
+            if not isinstance(target_results, CheckResults):
+                continue
+            for name, duration, cpu_time in target_results.check_timings:
+                _increment(durations, name, duration)
+                if cpu_time is not None:
+                    _increment(cpu_times, name, cpu_time)
+        timings = [(name, duration, cpu_times.get(name))
+                   for name, duration in six.iteritems(durations)]
+        return sorted(timings, key=lambda t: t[1], reverse=True)
+
+    @property
+    def ok(self):
+        """
+        If the results ended without any error
+
+
+        :return: True, if there is no check which ends with error (or timeout) status
+        """
+        statistics = self.statistics
+        return ERROR not in statistics and TIMEOUT not in statistics
+
+    @property
+    def fail(self):
+        """
+        If the results ended without any fail
+
+
+        :return: True, if there is no check which ends with fail status
+        """
+        return FAILED in self.statistics
+
+    def generate_pretty_output(self, stat, verbose, output_function, logs=True):
+        """
+        Send the formated to the provided function
+
+        :param stat: if True print stat instead of full output
+        :param verbose: bool
+        :param output_function: function to send output to
+        """
+        has_target = False
+        for target_name, target_results in self.results:
+            has_target = True
+            output_function("{}:".format(target_name))
+            if isinstance(target_results, CheckResults):
+                target_results.generate_pretty_output(stat=stat,
+                                                      verbose=verbose,
+                                                      output_function=output_function,
+                                                      logs=logs)
+            else:
+                output_function("{}:{}".format(ERROR, target_results), fg=COLOURS[ERROR])
+                output_function("")
+
+        if not has_target:
+            output_function("No target found.")
+
+    def get_pretty_string(self, stat, verbose):
+        """
+        Pretty string representation of the results
+
+        :param stat: bool
+        :param verbose: bool
+        :return: str
+        """
+        pretty_output = _PrettyOutputToStr()
+        self.generate_pretty_output(stat=stat,
+                                    verbose=verbose,
+                                    output_function=pretty_output.save_output)
+        return pretty_output.result
+
+
 class FailedCheckResult(CheckResult):
 
     def __init__(self, check, logs=None):
-        super(self.__class__, self) \
+        super(FailedCheckResult, self) \
             .__init__(ok=False,
                       message=check.message,
                       description=check.description,
@@ -198,6 +485,19 @@ class FailedCheckResult(CheckResult):
         return ERROR
 
 
+class TimedOutCheckResult(FailedCheckResult):
+    """ The check did not finish in time. """
+
+    @property
+    def status(self):
+        return TIMEOUT
+
+
+def _increment(counter, key, count=1):
+    counter.setdefault(key, 0)
+    counter[key] += count
+
+
 class _PrettyOutputToStr(object):
 
     def __init__(self):
@@ -20,6 +20,8 @@ This module is responsible for loading rulesets: reading from disk, parsing/vali
 import json
 import logging
 
+import six
+
 from ..exceptions import ColinRulesetException
 
 logger = logging.getLogger(__name__)
@@ -79,6 +81,7 @@ class CheckStruct(object):
         "tags": ["foo", "bar"],
         "additional_tags": ["baz"],
         "usable_targets": ["image", "dockerfile"],
+        "stages": "final",
       }
     """
 
@@ -109,11 +112,28 @@ class CheckStruct(object):
     def usable_targets(self):
         return self._get(False, "usable_targets")
 
+    @property
+    def stages(self):
+        """
+        stages of the dockerfile the check is evaluated for:
+        "final", "all" or list of stage names (None means the whole dockerfile at once)
+        """
+        stages = self._get(False, "stages")
+        if stages is None or stages in ("final", "all"):
+            return stages
+        if isinstance(stages, list) and stages \
+                and all(isinstance(s, six.string_types) for s in stages):
+            return stages
+        raise ColinRulesetException(
+            "Validation error: stages of check {} have to be 'final', 'all' "
+            "or a list of stage names, not {!r}.".format(self.name, stages))
+
     @property
     def other_attributes(self):
         """ return dict with all other data except for the described above"""
         return {k: v for k, v in self.c.items() if
-                k not in ["name", "names", "tags", "additional_tags", "usable_targets"]}
+                k not in ["name", "names", "tags", "additional_tags", "usable_targets",
+                          "stages"]}
 
 
 class RulesetStruct(object):
@@ -14,9 +14,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import hashlib
+import json
 import logging
 import os
+import re
 
+import six
+
+from ..checks.check_utils import REGEX_ATTRIBUTES, compile_regex
+from ..checks.labels import attach_label_rule_engine
 from ..constant import JSON, RULESET_DIRECTORY, RULESET_DIRECTORY_NAME
 from ..exceptions import ColinRulesetException
 from ..loader import CheckLoader
@@ -50,6 +57,16 @@ class Ruleset(object):
             raise ColinRulesetException("colin accepts only ruleset version '1'. You provided %r"
                                         % self.ruleset_struct.version)
 
+    @property
+    def digest(self):
+        """
+        Digest of the ruleset content.
+
+        :return: str
+        """
+        content = json.dumps(self.ruleset_struct.d, sort_keys=True)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
     def get_checks(self, target_type, tags=None):
         """
         Get all checks for given type/tags.
@@ -68,7 +85,7 @@ class Ruleset(object):
                 continue
 
             try:
-                check_class = self.check_loader.mapping[check_struct.name]
+                check_class = self.check_loader.get_check_class(check_struct.name)
             except KeyError:
                 raise ColinRulesetException(
                     "Can't find code for check {}.".format(check_struct.name))
@@ -101,17 +118,58 @@ class Ruleset(object):
                                                                            tags))
                     continue
 
+            if check_struct.stages is not None:
+                check_instance.stages = check_struct.stages
+
             # and finally, attach attributes from ruleset to the check instance
             for k, v in check_struct.other_attributes.items():
                 # yes, this overrides things; yes, users may easily and severely broke their setup
                 setattr(check_instance, k, v)
 
+            _validate_regexes(check_instance)
+            _validate_timeout(check_instance)
             result.append(check_instance)
             logger.debug("Check instance {} added.".format(check_instance.name))
 
+        attach_label_rule_engine(result)
         return result
 
 
+def _validate_regexes(check_instance):
+    """
+    Compile the regular expressions of the check (the compiled patterns are cached),
+    so the invalid ones are reported before the checks run.
+
+    :param check_instance: instance of some Check class
+    """
+    for attribute in REGEX_ATTRIBUTES:
+        pattern = getattr(check_instance, attribute, None)
+        if pattern is None:
+            continue
+        try:
+            compile_regex(pattern)
+        except (re.error, TypeError) as ex:
+            raise ColinRulesetException(
+                "Invalid regular expression {!r} in the {} of check {}: {}".format(
+                    pattern, attribute, check_instance.name, ex))
+
+
+def _validate_timeout(check_instance):
+    """
+    Check that the timeout of the check (if set in the ruleset) is a positive number.
+
+    :param check_instance: instance of some Check class
+    """
+    timeout = getattr(check_instance, "timeout", None)
+    if timeout is None:
+        return
+    if isinstance(timeout, bool) or not isinstance(timeout, (six.integer_types, float)) \
+            or timeout <= 0:
+        raise ColinRulesetException(
+            "Invalid timeout {!r} of check {}: it has to be a positive number of seconds.".format(
+                timeout, check_instance.name))
+
+
 def get_checks_path():
     """
     Get path to checks.
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Long-running colin service: keeps the check classes, rulesets and checks loaded
+and checks the targets requested over localhost HTTP or a Unix socket.
+
+POST /check with a json body:
+    {"target": "fedora:29"} or {"dockerfile": "FROM fedora:29 ..."}
+    optional: "ruleset_name": "fedora", "ruleset": {...}, "tags": ["label"]
+responds with the same json as CheckResults.json.
+
+GET /health responds with {"status": "ok", "version": "..."}.
+"""
+
+import io
+import json
+import logging
+import os
+import socket
+import stat
+import threading
+from collections import OrderedDict
+
+from six.moves import BaseHTTPServer, socketserver
+
+from ..utils.timing import timed
+from ..version import __version__
+from .cache import ResultCache
+from .check_runner import go_through_checks
+from .colin import _get_cache_key
+from .constant import DEFAULT_HOST, DEFAULT_PORT
+from .exceptions import ColinException, ColinRulesetException
+from .ruleset.ruleset import Ruleset
+from .target import Target
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUEST_SIZE = 10 * 1024 * 1024
+# number of the rulesets (and of the sets of checks) of the requests kept loaded
+MAX_CACHED_RULESETS = 64
+
+
+class ColinService(object):
+    """
+    Checks the targets with the rulesets and checks loaded only once.
+    """
+
+    def __init__(self, ruleset_name=None, ruleset_file=None, ruleset=None, workers=1,
+                 cache=False, cache_dir=None, logging_level=logging.WARNING, backend=None,
+                 timeout=None, budget=None, observers=None):
+        """
+        :param ruleset_name: str, default ruleset for the requests (default is "default")
+        :param ruleset_file: fileobj instance holding the default ruleset
+        :param ruleset: dict, content of the default ruleset
+        :param workers: int, number of checks running in parallel for one request
+        :param cache: bool, reuse the results of unchanged images/dockerfiles
+        :param cache_dir: str, directory of the result cache (default ~/.cache/colin)
+        :param logging_level: logging level of the checking
+        :param backend: DockerBackend instance used for all the requests
+                        (default is the one shared in the process)
+        :param timeout: float, seconds each check can run
+        :param budget: float, seconds all the checks of one request can run
+        :param observers: list of Observer instances notified about the checks
+                          and the docker calls of all the requests
+        """
+        self.default_ruleset = Ruleset(ruleset_name=ruleset_name,
+                                       ruleset_file=ruleset_file,
+                                       ruleset=ruleset)
+        # load the check classes (and validate the ruleset) now, not in the first request
+        self.default_ruleset.get_checks(target_type=None)
+        self.workers = workers
+        self.result_cache = ResultCache(directory=cache_dir) if cache else None
+        self.logging_level = logging_level
+        self.backend = backend
+        self.timeout = timeout
+        self.budget = budget
+        self.observers = observers
+        # the rulesets of the requests and their checks, the least recently used are dropped
+        self._rulesets = OrderedDict()
+        self._checks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_ruleset(self, ruleset_name=None, ruleset=None):
+        """
+        :return: (key of the ruleset, Ruleset instance)
+        """
+        if not ruleset_name and not ruleset:
+            return None, self.default_ruleset
+        key = json.dumps(ruleset, sort_keys=True) if ruleset else ruleset_name
+        with self._lock:
+            return key, _get_cached(self._rulesets, key,
+                                    lambda: Ruleset(ruleset_name=ruleset_name, ruleset=ruleset))
+
+    def _get_checks(self, ruleset_key, ruleset, target_type, tags):
+        key = (ruleset_key, target_type, tuple(sorted(tags or [])))
+        with self._lock:
+            return _get_cached(self._checks, key,
+                               lambda: ruleset.get_checks(target_type=target_type, tags=tags))
+
+    def check(self, request):
+        """
+        Check the target described by the request.
+
+        :param request: dict, see the module documentation
+        :return: CheckResults instance (all the results obtained)
+        """
+        if not isinstance(request, dict):
+            raise ColinException("The request has to be a json object.")
+        if "dockerfile" in request:
+            target = io.BytesIO(request["dockerfile"].encode("utf-8"))
+        elif "target" in request:
+            target = request["target"]
+        else:
+            raise ColinException("Target or dockerfile has to be provided.")
+        tags = request.get("tags")
+
+        ruleset_key, ruleset = self._get_ruleset(ruleset_name=request.get("ruleset_name"),
+                                                 ruleset=request.get("ruleset"))
+        target = Target(target=target, logging_level=self.logging_level, backend=self.backend,
+                        observers=self.observers)
+        timings = {}
+        with timed(timings, "check_loading"):
+            checks = self._get_checks(ruleset_key=ruleset_key, ruleset=ruleset,
+                                      target_type=target.target_type, tags=tags)
+        results = go_through_checks(target=target,
+                                    checks=checks,
+                                    workers=self.workers,
+                                    result_cache=self.result_cache,
+                                    cache_key=_get_cache_key(target=target,
+                                                             ruleset=ruleset,
+                                                             tags=tags,
+                                                             result_cache=self.result_cache),
+                                    timeout=self.timeout,
+                                    budget=self.budget,
+                                    timings=timings,
+                                    observers=self.observers)
+        list(results.results)
+        return results
+
+    def create_server(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+        """
+        Create the HTTP server for the service.
+
+        :param host: str, address to listen on
+        :param port: int, port to listen on (0 means any free port)
+        :param socket_path: str, path of the Unix socket to listen on instead of the host/port
+        :return: server instance (call serve_forever() on it)
+        """
+        if socket_path:
+            _remove_stale_socket(socket_path)
+            server = UnixHTTPServer(socket_path, ColinRequestHandler)
+        else:
+            server = ThreadingHTTPServer((host, port), ColinRequestHandler)
+        server.colin_service = self
+        return server
+
+
+def _remove_stale_socket(socket_path):
+    """
+    Remove the socket left by the previous run, refuse to remove anything else.
+
+    :param socket_path: str
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except OSError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ColinException("'{}' exists and it is not a socket.".format(socket_path))
+    os.remove(socket_path)
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+class ColinRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def address_string(self):
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        # Unix socket
+        return "local"
+
+    def log_message(self, format, *args):
+        logger.info("{} - {}".format(self.address_string(), format % args))
+
+    def _respond(self, status, content):
+        body = content.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _respond_error(self, status, message):
+        self._respond(status, json.dumps({"error": message}))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._respond(200, json.dumps({"status": "ok", "version": __version__}))
+        else:
+            self._respond_error(404, "Not found.")
+
+    def do_POST(self):
+        if self.path != "/check":
+            self._respond_error(404, "Not found.")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_REQUEST_SIZE:
+            self._respond_error(400, "Invalid Content-Length.")
+            return
+        try:
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError as ex:
+            self._respond_error(400, "Invalid json: {}".format(ex))
+            return
+
+        try:
+            results = self.server.colin_service.check(request)
+        except (ColinException, ColinRulesetException) as ex:
+            logger.warning("Request cannot be processed: {}".format(ex))
+            self._respond_error(400, str(ex))
+        except Exception as ex:
+            logger.exception("Error while processing the request.")
+            self._respond_error(500, str(ex))
+        else:
+            self._respond(200, results.json)
+
+
+def _get_cached(cache, key, create):
+    """
+    Get the value from the LRU cache, create it if it is not there.
+
+    :param cache: OrderedDict, the least recently used items first
+    :param key: key of the value
+    :param create: function without arguments creating the value
+    :return: the value
+    """
+    value = cache.pop(key, None)
+    if value is None:
+        value = create()
+        if len(cache) >= MAX_CACHED_RULESETS:
+            cache.popitem(last=False)
+    cache[key] = value
+    return value
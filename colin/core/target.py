@@ -18,21 +18,54 @@ import enum
 import io
 import logging
 import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
 
 import six
-from conu import DockerBackend, DockerImagePullPolicy
-from conu.apidefs.container import Container
-from conu.apidefs.image import Image
-from docker.errors import NotFound
 from dockerfile_parse import DockerfileParser
 
 from ..core.exceptions import ColinException
+from ..utils.timing import timed
 from .checks.containers import ContainerAbstractCheck
 from .checks.dockerfile import DockerfileAbstractCheck
 from .checks.images import ImageAbstractCheck
+from .dockerfile_model import DockerfileModel
+from .filesystem_index import FilesystemIndex
+from .image_archive import ImageArchive
+from .metadata import TargetMetadata
+from .observer import observe_docker_call
 
 logger = logging.getLogger(__name__)
 
+# prints 1 or 0 on a separate line for each file given as an argument
+FILE_PROBE_SCRIPT = 'for f in "$@"; do if [ -e "$f" ] || [ -L "$f" ]; ' \
+                    'then echo 1; else echo 0; fi; done'
+
+
+# docker backend shared by all the targets in the process, see get_docker_backend()
+_docker_backend = None
+_docker_backend_lock = threading.Lock()
+
+
+def get_docker_backend(logging_level=logging.WARNING):
+    """
+    Get the docker backend shared by all the targets in the process,
+    so conu is set up and the client connects to the daemon only once.
+
+    :param logging_level: logging level of conu (used when the backend is created)
+    :return: DockerBackend instance
+    """
+    global _docker_backend
+    with _docker_backend_lock:
+        if _docker_backend is None:
+            from conu import DockerBackend
+
+            logger.debug("Creating the docker backend.")
+            _docker_backend = DockerBackend(logging_level=logging_level)
+        return _docker_backend
+
 
 def is_compatible(target_type, check_instance):
     """
@@ -73,12 +106,53 @@ def inspect_object(obj, refresh=True):
 
 
 class Target(object):
+    """
+    Image, container or dockerfile to check.
+
+    conu and docker are imported only when they are needed (image/container targets),
+    so checking of dockerfiles does not pay for their import.
+    """
 
-    def __init__(self, target, logging_level):
-        self.instance = Target._get_target_instance(target, logging_level=logging_level)
+    def __init__(self, target, logging_level, backend=None, observers=None):
+        """
+        :param target: see _get_target_instance
+        :param logging_level: logging level
+        :param backend: DockerBackend instance to look the image/container up with
+                        (default is the one shared in the process, see get_docker_backend)
+        :param observers: list of Observer instances notified about the docker calls
+        """
+        self.observers = observers or []
+        # seconds spent in target resolution, inspect, container start...
+        self.timings = {}
+        with timed(self.timings, "target"):
+            self.instance = Target._get_target_instance(target,
+                                                        logging_level=logging_level,
+                                                        backend=backend,
+                                                        observers=self.observers)
+        self._target_type = None
+        self._lock = threading.Lock()
+        self._metadata = None
+        self._metadata_lock = threading.Lock()
+        self._dockerfile = None
+        self._dockerfile_lock = threading.Lock()
+        self._stage_targets = {}
+        self._filesystem_index = None
+        self._filesystem_index_lock = threading.Lock()
+        self._file_probes = {}
+        self._file_probes_lock = threading.Lock()
+        # scratch container for the commands in the image (see exec_container)
+        self._scratch_container = None
+        self._scratch_container_starting = False
+        self._scratch_container_changed = threading.Condition(self._lock)
+        # incremented by retire_scratch_container()
+        self._scratch_container_generation = 0
+        # id -> [container, number of checks using it]
+        self._scratch_container_users = {}
+        self._retired_containers = []
+        self._clean_up_requested = False
 
     @staticmethod
-    def _get_target_instance(target, logging_level):
+    def _get_target_instance(target, logging_level, backend=None, observers=None):
         """
         Get the Container/Image instance for the given name.
         (Container is the first choice.)
@@ -87,22 +161,35 @@ class Target(object):
         :param target: str
                         or instance of Image/Container
                         or file-like object as Dockerfile
+                        or path to `docker save` tarball or OCI image layout
+        :param logging_level: logging level
+        :param backend: DockerBackend instance or None for the shared one
+        :param observers: list of Observer instances notified about the docker calls
         :return: Target object
         """
         logger.debug("Finding target '{}'.".format(target))
 
-        if isinstance(target, (Image, Container)):
-            logger.debug("Target is a conu object.")
-            return target
         if isinstance(target, io.IOBase):
             logger.debug("Target is a dockerfile loaded from the file-like object.")
-            return DockerfileParser(fileobj=target)
-        if os.path.isfile(target):
+            return DockerfileParser(fileobj=target, cache_content=True)
+        if isinstance(target, six.string_types) and ImageArchive.is_image_archive(target):
+            logger.debug("Target is an image archive.")
+            return ImageArchive(target)
+        if isinstance(target, six.string_types) and os.path.isfile(target):
             logger.debug("Target is a dockerfile.")
-            return DockerfileParser(fileobj=open(target))
+            return DockerfileParser(fileobj=open(target), cache_content=True)
+
+        from conu import DockerImagePullPolicy
+        from conu.apidefs.container import Container
+        from conu.apidefs.image import Image
+        from docker.errors import NotFound
 
-        with DockerBackend(logging_level=logging_level) as backend:
+        if isinstance(target, (Image, Container)):
+            logger.debug("Target is a conu object.")
+            return target
 
+        backend = backend or get_docker_backend(logging_level=logging_level)
+        with observe_docker_call(observers, "lookup"):
             try:
                 cont = backend.ContainerClass(image=None,
                                               container_id=target)
@@ -111,7 +198,8 @@ class Target(object):
             except NotFound:
 
                 image_name = ImageName.parse(target)
-                logger.debug("Finding image '{}' with tag '{}'.".format(image_name.name, image_name.tag))
+                logger.debug("Finding image '{}' with tag '{}'.".format(image_name.name,
+                                                                       image_name.tag))
 
                 if image_name.tag:
                     image = backend.ImageClass(repository=image_name.name,
@@ -134,15 +222,161 @@ class Target(object):
 
         :return: TargetType enum
         """
+        if self._target_type is None:
+            self._target_type = self._get_target_type()
+        return self._target_type
+
+    def _get_target_type(self):
+        if isinstance(self.instance, DockerfileParser):
+            return TargetType.DOCKERFILE
+        if isinstance(self.instance, ImageArchive):
+            return TargetType.IMAGE
+
+        from conu.apidefs.container import Container
+        from conu.apidefs.image import Image
+
         if isinstance(self.instance, Image):
             return TargetType.IMAGE
         elif isinstance(self.instance, Container):
             return TargetType.CONTAINER
-        elif isinstance(self.instance, DockerfileParser):
-            return TargetType.DOCKERFILE
         logger.debug("Target type not found.")
         raise ColinException("Target type not found.")
 
+    @property
+    def metadata(self):
+        """
+        Metadata of the image/container target.
+        They are loaded on the first access and cached,
+        use invalidate_metadata() to reload them (e.g. for a running container).
+
+        :return: TargetMetadata instance
+        """
+        if self.target_type == TargetType.DOCKERFILE:
+            raise ColinException("Metadata are not available for the dockerfile target.")
+        with self._metadata_lock:
+            if self._metadata is None:
+                with timed(self.timings, "inspect"), \
+                        observe_docker_call(self.observers, "inspect"):
+                    self._metadata = TargetMetadata(inspect_object(self.instance, refresh=True))
+            return self._metadata
+
+    @property
+    def dockerfile(self):
+        """
+        Model of the dockerfile target, it is parsed on the first access
+        and shared by all the checks.
+
+        :return: DockerfileModel instance
+        """
+        if self.target_type != TargetType.DOCKERFILE:
+            raise ColinException("Dockerfile model is available only for the dockerfile target.")
+        with self._dockerfile_lock:
+            if self._dockerfile is None:
+                with timed(self.timings, "dockerfile_parse"):
+                    self._dockerfile = DockerfileModel(self.instance)
+            return self._dockerfile
+
+    def get_stage_targets(self, selector):
+        """
+        Get the targets for the stages of the dockerfile target.
+
+        :param selector: "final", "all" or list of stage names
+        :return: list of DockerfileStageTarget instances
+        """
+        stages = self.dockerfile.get_stages(selector)
+        with self._dockerfile_lock:
+            return [self._stage_targets.setdefault(stage.index,
+                                                   DockerfileStageTarget(self, stage))
+                    for stage in stages]
+
+    def invalidate_metadata(self):
+        """
+        Drop the cached metadata, they will be loaded again on the next access.
+        """
+        with self._metadata_lock:
+            self._metadata = None
+
+    @property
+    def filesystem_index(self):
+        """
+        Index of the files in the image target, built on the first access from the image layers.
+        There is no index for the container (its filesystem can differ from the image)
+        and the dockerfile targets.
+
+        :return: FilesystemIndex instance or None
+        """
+        if self.target_type != TargetType.IMAGE:
+            return None
+        with self._filesystem_index_lock:
+            if self._filesystem_index is None:
+                with timed(self.timings, "filesystem_index"):
+                    self._filesystem_index = self._create_filesystem_index()
+            return self._filesystem_index
+
+    def _create_filesystem_index(self):
+        if isinstance(self.instance, ImageArchive):
+            return FilesystemIndex.from_layers(self.instance.layers())
+
+        logger.debug("Saving the image to read its layers.")
+        tmpdir = tempfile.mkdtemp(prefix="colin-")
+        try:
+            archive_path = os.path.join(tmpdir, "image.tar")
+            with open(archive_path, "wb") as archive, \
+                    observe_docker_call(self.observers, "image_save"):
+                for chunk in self.instance.d.get_image(self.instance.get_id()):
+                    archive.write(chunk)
+            return FilesystemIndex.from_layers(ImageArchive(archive_path).layers())
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def files_present(self, paths):
+        """
+        Find out which files are present in the image/container target.
+
+        The filesystem index is used for images. In containers, all the files
+        not asked before are probed by a single command; the answers are cached.
+
+        :param paths: list of str, absolute paths
+        :return: dict (path -> bool)
+        """
+        if self.target_type == TargetType.DOCKERFILE:
+            raise ColinException("Files cannot be probed in the dockerfile target.")
+        index = self.filesystem_index
+        if index is not None:
+            return {p: index.file_is_present(p) for p in paths}
+
+        with self._file_probes_lock:
+            missing = sorted(set(p for p in paths if p not in self._file_probes))
+            if missing:
+                self._file_probes.update(self._probe_files(missing))
+            return {p: self._file_probes[p] for p in paths}
+
+    def _probe_files(self, paths):
+        from conu.exceptions import ConuException
+
+        logger.debug("Probing {} files in the container.".format(len(paths)))
+        with self.exec_container() as container:
+            try:
+                with observe_docker_call(self.observers, "exec"):
+                    output = container.execute(
+                        ["/bin/sh", "-c", FILE_PROBE_SCRIPT, "sh"] + list(paths))
+                answers = "".join([o.decode() for o in output]).split()
+                if len(answers) == len(paths):
+                    return {p: a == "1" for p, a in zip(paths, answers)}
+                logger.info("Unexpected output of the file probe: {}".format(answers))
+            except ConuException as ex:
+                logger.info("Files cannot be probed by the shell, using ls: {}".format(ex))
+
+            result = {}
+            for p in paths:
+                try:
+                    with observe_docker_call(self.observers, "exec"):
+                        result[p] = bool(container.execute(["/bin/ls", "-1", p]))
+                except ConuException as ex:
+                    logger.info("File {} is not present, ex: {}".format(p, ex))
+                    result[p] = False
+            return result
+
     @property
     def labels(self):
         """
@@ -151,37 +385,192 @@ class Target(object):
         :return: [str]
         """
         if self.target_type == TargetType.DOCKERFILE:
-            return self.instance.labels
-        # labels won't change, hence refresh=false
-        return inspect_object(self.instance, refresh=False)["Config"]["Labels"]
+            return self.dockerfile.labels
+        return self.metadata.labels
 
     def get_output(self, cmd):
+        """
+        Execute the command in the target and return its output.
+
+        :param cmd: str or list of str
+        :return: str
+        """
         if isinstance(cmd, six.string_types):
             cmd = [cmd]
-        if self.target_type == TargetType.CONTAINER:
-            if not self.instance.is_running():
-                raise ColinException("Cannot get output for a stopped container.")
-            output = "".join([o.decode() for o in self.instance.execute(command=cmd)])
-            exit_code = inspect_object(self.instance, refresh=True)["State"]["ExitCode"]
+        with self.exec_container() as container, observe_docker_call(self.observers, "exec"):
+            return "".join([o.decode() for o in container.execute(command=cmd)])
+
+    @contextmanager
+    def exec_container(self):
+        """
+        Get the running container where the commands can be executed.
 
-            if exit_code != 0:
-                raise ColinException(
-                    "Container exited with the code {}. Output:\n{}".format(exit_code, output))
+        For the container target, it is the container itself.
+        For the image target, it is a scratch container created from the image
+        on the first use and shared by all the checks. It is removed by clean_up().
 
+        :return: context manager providing the Container instance
+        """
+        if self.target_type == TargetType.CONTAINER:
+            with observe_docker_call(self.observers, "inspect"):
+                running = self.instance.is_running()
+            if not running:
+                raise ColinException("Cannot get output for a stopped container.")
+            yield self.instance
+        elif isinstance(self.instance, ImageArchive):
+            raise ColinException("Cannot execute commands in an image archive.")
         elif self.target_type == TargetType.IMAGE:
-            container = self.instance.run_via_binary(command=cmd)
-            container.wait()
-            output = "".join([o.decode() for o in container.logs()])
-            exit_code = inspect_object(container, refresh=True)["State"]["ExitCode"]
-            container.delete(force=True)
-
-            if exit_code != 0:
-                raise ColinException(
-                    "Container exited with the code {}. Output:\n{}".format(exit_code, output))
-            return output
+            container = self._acquire_scratch_container()
+            try:
+                yield container
+            finally:
+                self._release_scratch_container(container)
         else:
             raise ColinException("Cannot get command output for given target type.")
 
+    def _acquire_scratch_container(self):
+        from conu import DockerRunBuilder
+
+        with self._lock:
+            while self._scratch_container is None and self._scratch_container_starting:
+                # some other check is starting it
+                self._scratch_container_changed.wait()
+            if self._scratch_container is not None:
+                container = self._scratch_container
+                self._scratch_container_users[id(container)][1] += 1
+                return container
+            self._scratch_container_starting = True
+            generation = self._scratch_container_generation
+
+        # the lock is not held during the docker call, so a hanging start
+        # does not block retire_scratch_container()
+        try:
+            logger.debug("Creating the scratch container for the image.")
+            drb = DockerRunBuilder(command=["/bin/sleep", "infinity"],
+                                   additional_opts=["--entrypoint="])
+            with timed(self.timings, "container_start"), \
+                    observe_docker_call(self.observers, "container_start"):
+                container = self.instance.run_via_binary(run_command_instance=drb)
+        except Exception:
+            with self._lock:
+                if generation == self._scratch_container_generation:
+                    self._scratch_container_starting = False
+                self._scratch_container_changed.notify_all()
+            raise
+
+        with self._lock:
+            self._scratch_container_users[id(container)] = [container, 1]
+            if generation == self._scratch_container_generation:
+                self._scratch_container = container
+                self._scratch_container_starting = False
+            else:
+                # retired while it was starting, only this check uses it
+                self._retired_containers.append(container)
+            self._scratch_container_changed.notify_all()
+        return container
+
+    def _release_scratch_container(self, container):
+        with self._lock:
+            users = self._scratch_container_users.get(id(container))
+            # the container could have been removed by clean_up() already
+            if users and users[0] is container:
+                users[1] -= 1
+            unused = self._pop_unused_containers()
+        self._remove_containers(unused)
+
+    def retire_scratch_container(self):
+        """
+        The checks started from now on get a new scratch container
+        (e.g. a command hangs in the current one).
+        The current one is removed once no check uses it, or by clean_up().
+        """
+        with self._lock:
+            self._scratch_container_generation += 1
+            self._scratch_container_starting = False
+            if self._scratch_container is not None:
+                self._retired_containers.append(self._scratch_container)
+                self._scratch_container = None
+            unused = self._pop_unused_containers()
+            self._scratch_container_changed.notify_all()
+        self._remove_containers(unused)
+
+    def clean_up(self):
+        """
+        Remove the scratch container (if any).
+        If some check still uses it, it is removed as soon as the check finishes.
+        The retired containers are removed even if they are used,
+        the checks using them were given up (timed out).
+        """
+        with self._lock:
+            self._clean_up_requested = True
+            unused = self._pop_unused_containers()
+            unused += self._retired_containers
+            for container in self._retired_containers:
+                self._scratch_container_users.pop(id(container), None)
+            self._retired_containers = []
+        self._remove_containers(unused)
+
+    def _pop_unused_containers(self):
+        # has to be called with self._lock acquired
+        def is_unused(container):
+            return not self._scratch_container_users[id(container)][1]
+
+        unused = [c for c in self._retired_containers if is_unused(c)]
+        self._retired_containers = [c for c in self._retired_containers if not is_unused(c)]
+        if self._clean_up_requested and (self._scratch_container is None
+                                         or is_unused(self._scratch_container)):
+            self._clean_up_requested = False
+            if self._scratch_container is not None:
+                unused.append(self._scratch_container)
+                self._scratch_container = None
+        for container in unused:
+            self._scratch_container_users.pop(id(container), None)
+        return unused
+
+    def _remove_containers(self, containers):
+        for container in containers:
+            logger.debug("Removing the scratch container.")
+            try:
+                with observe_docker_call(self.observers, "container_remove"):
+                    container.delete(force=True)
+            except Exception as ex:
+                logger.warning("The scratch container cannot be removed: {}".format(ex))
+
+
+class DockerfileStageTarget(object):
+    """
+    One stage of the dockerfile target, checks scoped to stages get it instead of the Target.
+    """
+
+    def __init__(self, target, stage):
+        """
+        :param target: Target instance (dockerfile)
+        :param stage: DockerfileStage instance
+        """
+        self.target = target
+        self.instance = target.instance
+        self.stage = stage
+
+    def __str__(self):
+        return "stage '{}'".format(self.stage)
+
+    @property
+    def target_type(self):
+        return TargetType.DOCKERFILE
+
+    @property
+    def dockerfile(self):
+        """
+        The stage provides the same interface as the DockerfileModel.
+
+        :return: DockerfileStage instance
+        """
+        return self.stage
+
+    @property
+    def labels(self):
+        return self.stage.labels
+
 
 class TargetType(enum.Enum):
     DOCKERFILE = 0
@@ -7,14 +7,48 @@ class CachingIterable(object):
         self.iter = iter(iterable)
         self.done = False
         self.vals = []
+        self.callbacks = []
+        self.caching = True
+
+    def add_callback(self, callback):
+        """
+        Call the function with every value as soon as it's obtained
+        (values obtained before are passed immediately).
+
+        :param callback: function accepting one argument, the value
+        """
+        for val in self.vals:
+            callback(val)
+        self.callbacks.append(callback)
+
+    def stop_caching(self):
+        """
+        Stop keeping the values (they are passed only to the callbacks
+        and to the running iteration), the values cannot be iterated again then.
+        """
+        self.caching = False
+        self.vals = []
+
+    def consume(self):
+        """
+        Obtain all the remaining values.
+        """
+        if not self.done:
+            for _ in self._gen_iter():
+                pass
 
     def __iter__(self):
         if self.done:
+            if not self.caching:
+                raise RuntimeError("The values were not cached, they cannot be iterated again.")
             return iter(self.vals)
         return itertools.chain(self.vals, self._gen_iter())
 
     def _gen_iter(self):
         for new_val in self.iter:
-            self.vals.append(new_val)
+            if self.caching:
+                self.vals.append(new_val)
+            for callback in self.callbacks:
+                callback(new_val)
             yield new_val
         self.done = True
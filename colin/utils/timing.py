@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import threading
+import time
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed(timings, phase):
+    """
+    Measure the wall time of the block and add it to the timings.
+
+    :param timings: dict (name of the phase -> seconds)
+    :param phase: str, name of the phase
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        duration = time.time() - start
+        with _lock:
+            timings[phase] = timings.get(phase, 0.0) + duration
+
+
+def thread_cpu_time():
+    """
+    CPU time of the current thread.
+
+    :return: float (seconds) or None if not available (python < 3.7)
+    """
+    if hasattr(time, "thread_time"):
+        return time.thread_time()
+    return None
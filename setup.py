@@ -16,11 +16,39 @@
 #
 
 import os
+import sys
 
 from setuptools import find_packages, setup
+from setuptools.command.build_py import build_py
 
 BASE_PATH = os.path.dirname(__file__)
 
+
+class BuildPyWithManifest(build_py):
+    """
+    Generate the manifest of the checks (speeds up loading of the checks) into the build.
+    """
+
+    def run(self):
+        build_py.run(self)
+        if self.dry_run:
+            return
+        sys.path.insert(0, os.path.abspath(BASE_PATH))
+        try:
+            from colin.core.loader import generate_manifest
+            from colin.core.ruleset.ruleset import get_checks_path
+        except ImportError as ex:
+            # colin falls back to loading all the checks without the manifest
+            self.warn("Can't generate the manifest of the checks: {}".format(ex))
+            return
+        finally:
+            sys.path.pop(0)
+        manifest_path = os.path.join(self.build_lib, "colin", "checks", "manifest.json")
+        self.announce("generating {}".format(manifest_path), level=2)
+        # the check files are copied to the build, so their digests are the same
+        generate_manifest(get_checks_path(), manifest_path=manifest_path)
+
+
 # https://packaging.python.org/guides/single-sourcing-package-version/
 version = {}
 with open("./colin/version.py") as fp:
@@ -35,6 +63,12 @@ setup(
     long_description=long_description,
     # long_description_content_type='text/markdown',
     packages=find_packages(exclude=['examples', 'tests']),
+    cmdclass={'build_py': BuildPyWithManifest},
+    # needed to generate the manifest of the checks
+    setup_requires=[
+        'six',
+        'dockerfile_parse'
+    ],
     install_requires=[
         'Click',
         'six',
@@ -1,6 +1,7 @@
 import logging
 import os
 import subprocess
+import sys
 
 import pytest
 from conu import DockerBackend
@@ -10,6 +11,11 @@ from colin.core.colin import _set_logging
 
 _set_logging(level=logging.DEBUG)
 
+collect_ignore = []
+if sys.version_info < (3, 5):
+    # the asyncio API (and its tests using async def) needs python 3.5+
+    collect_ignore.append(os.path.join("unit", "test_aio.py"))
+
 
 BASH_IMAGE = "colin-test-bash"
 LS_IMAGE = "colin-test-ls"
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import json
+import time
+
+import colin
+from colin.core.check_runner import go_through_checks
+from colin.core.checks.abstract_check import AbstractCheck
+from colin.core.constant import ERROR, FAILED, PASSED, TIMEOUT
+from colin.core.result import CheckResult
+from tests.unit.test_check_runner import FakeTarget, SleepyCheck
+from tests.unit.test_result import without_timings
+
+
+class AsyncSleepyCheck(AbstractCheck):
+
+    def __init__(self, name, delay, ok=True):
+        super(AsyncSleepyCheck, self).__init__(message="m", description="d",
+                                               reference_url="u", tags=["t"])
+        self.name = name
+        self.delay = delay
+        self.ok = ok
+
+    async def check(self, target):
+        await asyncio.sleep(self.delay)
+        if self.ok is None:
+            raise RuntimeError("broken check")
+        return CheckResult(ok=self.ok,
+                           description=self.description,
+                           message=self.message,
+                           reference_url=self.reference_url,
+                           check_name=self.name,
+                           logs=[])
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_run_async_dockerfile(tmpdir):
+    dockerfile = tmpdir.join("Dockerfile")
+    dockerfile.write("FROM fedora:latest\nLABEL maintainer=me\n")
+    ruleset = {"version": "1",
+               "checks": [{"name": "maintainer_label"}, {"name": "from_tag_not_latest"}]}
+
+    results = _run(colin.run_async(target=str(dockerfile), ruleset=ruleset))
+    expected = colin.run(target=str(dockerfile), ruleset=ruleset)
+    assert without_timings(json.loads(results.json)) == without_timings(json.loads(expected.json))
+    assert [r.status for r in results.results] == [PASSED, FAILED]
+
+
+def test_run_many_async_errors():
+    results = _run(colin.run_many_async(targets=["/non/existing/Dockerfile"],
+                                        ruleset={"version": "1", "checks": []},
+                                        backend=object()))
+    assert not results.ok
+
+
+def test_async_checks_overlap():
+    from colin.core.aio import _AsyncRunner
+
+    async def check_all():
+        runner = _AsyncRunner(ruleset=None, tags=None, logging_level=10, concurrency=4,
+                              result_cache=None, backend=None)
+        target = FakeTarget()
+        checks = [AsyncSleepyCheck("async-{}".format(i), 0.3) for i in range(4)] \
+            + [AsyncSleepyCheck("broken", 0, ok=None), SleepyCheck("sync", 0.3, ok=False)]
+        try:
+            return await asyncio.gather(*[runner._run_check(target, c) for c in checks])
+        finally:
+            runner.executor.shutdown()
+
+    start = time.time()
+    results = _run(check_all())
+    assert time.time() - start < 1.0
+    assert [r.status for r in results] == [PASSED] * 4 + [ERROR, FAILED]
+    assert results[0].check_type == "AbstractCheck"
+
+
+def test_async_check_in_sync_runner():
+    results = go_through_checks(target=FakeTarget(),
+                                checks=[AsyncSleepyCheck("async", 0), SleepyCheck("sync", 0)])
+    assert [r.status for r in results.results] == [PASSED, PASSED]
+
+
+def test_async_check_times_out():
+    from colin.core.aio import _AsyncRunner
+
+    async def check_all():
+        runner = _AsyncRunner(ruleset=None, tags=None, logging_level=10, concurrency=4,
+                              result_cache=None, backend=None, timeout=0.2)
+        target = FakeTarget()
+        checks = [AsyncSleepyCheck("hanging", 5), SleepyCheck("sync", 0)]
+        try:
+            return target, await asyncio.gather(*[runner._run_check(target, c) for c in checks])
+        finally:
+            runner.executor.shutdown()
+
+    target, results = _run(check_all())
+    assert [r.status for r in results] == [TIMEOUT, PASSED]
+    assert target.retired
+
+
+def test_hanging_sync_check_does_not_block_clean_up():
+    from colin.core.aio import _AsyncRunner
+
+    class FakeImageTarget(FakeTarget):
+        target_type = None
+        timings = {}
+
+    target = FakeImageTarget()
+    runner = _AsyncRunner(ruleset=None, tags=None, logging_level=10, concurrency=1,
+                          result_cache=None, backend=None, timeout=0.3)
+    runner._prepare_target = lambda t: (target, None, None)
+    runner._get_checks = lambda target_type: [SleepyCheck("hanging", 3)]
+    start = time.time()
+    try:
+        _, results = _run(runner.check_target("image"))
+    finally:
+        runner.executor.shutdown(wait=False)
+    assert [r.status for r in results.results] == [TIMEOUT]
+    assert target.retired and target.cleaned_up
+    assert time.time() - start < 2.0
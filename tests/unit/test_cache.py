@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+
+import colin
+from colin.core.cache import ResultCache, get_cache_key
+from colin.core.check_runner import go_through_checks
+from colin.core.checks.abstract_check import AbstractCheck
+from colin.core.constant import FAILED, PASSED
+from colin.core.result import CheckResult, FailedCheckResult, TimedOutCheckResult
+
+
+class CountingCheck(AbstractCheck):
+    name = "counting"
+
+    def __init__(self):
+        super(CountingCheck, self).__init__(message="m", description="d",
+                                            reference_url="u", tags=["a", "b"])
+        self.runs = 0
+
+    def check(self, target):
+        self.runs += 1
+        return CheckResult(ok=False, description=self.description, message=self.message,
+                           reference_url=self.reference_url, check_name=self.name,
+                           logs=["run {}".format(self.runs)])
+
+
+class FakeTarget(object):
+
+    def clean_up(self):
+        pass
+
+
+def test_results_are_cached(tmpdir):
+    cache = ResultCache(directory=str(tmpdir))
+    key = get_cache_key("image-id", "ruleset")
+    check = CountingCheck()
+    for _ in range(3):
+        results = go_through_checks(target=FakeTarget(), checks=[check],
+                                    result_cache=cache, cache_key=key)
+        assert results.statistics == {FAILED: 1}
+        assert results.tag_statistics == {"a": {FAILED: 1}, "b": {FAILED: 1}}
+        assert [r.logs for r in results.results] == [["run 1"]]
+    assert check.runs == 1
+
+
+def test_errors_are_not_cached(tmpdir):
+    cache = ResultCache(directory=str(tmpdir))
+    cache.save("key", [FailedCheckResult(CountingCheck())])
+    assert cache.load("key") is None
+    cache.save("key", [TimedOutCheckResult(CountingCheck())])
+    assert cache.load("key") is None
+
+
+def test_least_recently_used_are_evicted(tmpdir):
+    cache = ResultCache(directory=str(tmpdir), max_entries=2)
+    result = CheckResult(ok=True, description="d", message="m", reference_url="u",
+                         check_name="c", logs=[])
+    for i, key in enumerate(["first", "second"]):
+        cache.save(key, [result])
+        os.utime(str(tmpdir.join(key + ".json")), (1000 + i, 1000 + i))
+    # using the first one makes the second one the least recently used
+    assert [r.status for r in cache.load("first")] == [PASSED]
+    cache.save("third", [result])
+    assert cache.load("second") is None
+    assert cache.load("first") is not None
+    assert cache.load("third") is not None
+
+
+def test_changed_dockerfiles_only(tmpdir):
+    dockerfile = tmpdir.join("Dockerfile")
+    dockerfile.write("FROM fedora:30\nLABEL maintainer=me\n")
+    cache_dir = str(tmpdir.join("cache"))
+    ruleset = {"version": "1", "checks": [{"name": "maintainer_label"}]}
+
+    def checked_targets():
+        results = colin.run_many(targets=[str(dockerfile)], ruleset=ruleset,
+                                 cache_dir=cache_dir, changed_only=True)
+        return [target for target, _ in results.results]
+
+    assert checked_targets() == [str(dockerfile)]
+    assert len(os.listdir(cache_dir)) == 1
+    assert checked_targets() == []
+
+    dockerfile.write("FROM fedora:31\nLABEL maintainer=me\n")
+    assert checked_targets() == [str(dockerfile)]
+    assert checked_targets() == []
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_unchanged_failures_are_reported(tmpdir):
+    dockerfile = tmpdir.join("Dockerfile")
+    dockerfile.write("FROM fedora:30\n")
+    cache_dir = str(tmpdir.join("cache"))
+    ruleset = {"version": "1", "checks": [{"name": "maintainer_label"}]}
+
+    for _ in range(2):
+        results = colin.run_many(targets=[str(dockerfile)], ruleset=ruleset,
+                                 cache_dir=cache_dir, changed_only=True)
+        assert [target for target, _ in results.results] == [str(dockerfile)]
+        assert results.fail
+        assert results.statistics == {FAILED: 1}
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import subprocess
+import time
+
+import pytest
+from conu.apidefs.container import Container
+from conu.apidefs.image import Image
+from conu.exceptions import ConuException
+
+from colin.core.check_runner import go_through_checks
+from colin.core.checks.abstract_check import AbstractCheck
+from colin.core.checks.filesystem import FileCheck
+from colin.core.constant import ERROR, FAILED, PASSED, TIMEOUT
+from colin.core.result import CheckResult
+from colin.core.target import Target
+
+
+class FakeTarget(object):
+
+    def __init__(self):
+        self.cleaned_up = False
+        self.retired = False
+
+    def retire_scratch_container(self):
+        self.retired = True
+
+    def clean_up(self):
+        self.cleaned_up = True
+
+
+class LocalContainer(Container):
+    """ container executing the commands on the host """
+
+    def __init__(self):
+        self.commands = []
+
+    def is_running(self):
+        return True
+
+    def execute(self, command):
+        self.commands.append(command)
+        try:
+            return [subprocess.check_output(command)]
+        except subprocess.CalledProcessError as ex:
+            raise ConuException(str(ex))
+
+
+class LocalImage(Image):
+    """ image whose containers execute the commands on the host """
+
+    def __init__(self):
+        super(LocalImage, self).__init__("local")
+        self.containers = []
+
+    def run_via_binary(self, run_command_instance=None):
+        container = LocalScratchContainer()
+        self.containers.append(container)
+        return container
+
+
+class LocalScratchContainer(LocalContainer):
+    """ the commands fail if the container is removed while they run """
+
+    def __init__(self):
+        super(LocalScratchContainer, self).__init__()
+        self.deleted = False
+
+    def execute(self, command):
+        output = super(LocalScratchContainer, self).execute(command)
+        if self.deleted:
+            raise ConuException("The container was removed.")
+        return output
+
+    def delete(self, force=False, volumes=False):
+        self.deleted = True
+
+
+class CommandCheck(AbstractCheck):
+
+    def __init__(self, name, command, timeout=None):
+        super(CommandCheck, self).__init__(message="m", description="d",
+                                           reference_url="u", tags=["t"])
+        self.name = name
+        self.command = command
+        self.timeout = timeout
+
+    def check(self, target):
+        output = target.get_output(["/bin/sh", "-c", self.command])
+        return CheckResult(ok=output.strip() == "ok",
+                           description=self.description,
+                           message=self.message,
+                           reference_url=self.reference_url,
+                           check_name=self.name,
+                           logs=[output])
+
+
+class SleepyCheck(AbstractCheck):
+
+    def __init__(self, name, delay, ok=True):
+        super(SleepyCheck, self).__init__(message="m", description="d",
+                                          reference_url="u", tags=["t"])
+        self.name = name
+        self.delay = delay
+        self.ok = ok
+
+    def check(self, target):
+        time.sleep(self.delay)
+        if self.ok is None:
+            raise RuntimeError("broken check")
+        return CheckResult(ok=self.ok,
+                           description=self.description,
+                           message=self.message,
+                           reference_url=self.reference_url,
+                           check_name=self.name,
+                           logs=[])
+
+
+@pytest.mark.parametrize("workers", [1, 2, 8])
+def test_results_keep_order(workers):
+    checks = [SleepyCheck("slow", 0.2),
+              SleepyCheck("fails", 0.1, ok=False),
+              SleepyCheck("broken", 0.0, ok=None),
+              SleepyCheck("fast", 0.0)]
+    target = FakeTarget()
+    results = go_through_checks(target=target, checks=checks, workers=workers)
+    assert [r.check_name for r in results.results] == ["slow", "fails", "broken", "fast"]
+    assert [r.status for r in results.results] == [PASSED, FAILED, ERROR, PASSED]
+    assert results.check_type_statistics == {"AbstractCheck": {PASSED: 2, FAILED: 1, ERROR: 1}}
+    assert target.cleaned_up
+
+
+def test_checks_run_in_parallel():
+    checks = [SleepyCheck("check-{}".format(i), 0.3) for i in range(4)]
+    start = time.time()
+    results = go_through_checks(target=FakeTarget(), checks=checks, workers=4)
+    assert len(list(results.results)) == 4
+    assert time.time() - start < 1.0
+
+
+def test_hanging_check_times_out():
+    hanging = SleepyCheck("hanging", 5)
+    own_timeout = SleepyCheck("own-timeout", 0.5)
+    own_timeout.timeout = 0.1
+    checks = [hanging, SleepyCheck("fast", 0.0), own_timeout]
+    target = FakeTarget()
+    start = time.time()
+    results = go_through_checks(target=target, checks=checks, timeout=0.2)
+    assert [r.status for r in results.results] == [TIMEOUT, PASSED, TIMEOUT]
+    assert time.time() - start < 2.0
+    assert target.retired
+    assert not results.ok
+    assert results.statistics == {PASSED: 1, TIMEOUT: 2}
+
+
+def test_timeout_does_not_disturb_parallel_checks():
+    image = LocalImage()
+    target = Target(target=image, logging_level=10)
+    checks = [CommandCheck("hanging", "sleep 3", timeout=0.3),
+              CommandCheck("slow-1", "sleep 0.8; echo ok"),
+              CommandCheck("slow-2", "sleep 0.8; echo ok"),
+              CommandCheck("after-timeout", "sleep 0.5; echo ok")]
+    results = go_through_checks(target=target, checks=checks, workers=3, timeout=2)
+    assert [r.status for r in results.results] == [TIMEOUT, PASSED, PASSED, PASSED]
+    # the checks started after the timeout got a new container
+    assert len(image.containers) == 2
+    assert all(c.deleted for c in image.containers)
+
+
+def test_timeout_while_container_starts():
+    image = LocalImage()
+    run_via_binary = image.run_via_binary
+    starts = []
+
+    def hanging_start(run_command_instance=None):
+        starts.append(run_command_instance)
+        if len(starts) == 1:
+            time.sleep(2)
+        return run_via_binary(run_command_instance)
+
+    image.run_via_binary = hanging_start
+    target = Target(target=image, logging_level=10)
+    checks = [CommandCheck("hanging-start", "echo ok", timeout=0.3),
+              CommandCheck("next", "echo ok")]
+    start = time.time()
+    results = go_through_checks(target=target, checks=checks)
+    assert [r.status for r in results.results] == [TIMEOUT, PASSED]
+    assert time.time() - start < 1.5
+
+
+def test_run_budget_exhausted():
+    checks = [SleepyCheck("check-{}".format(i), 0.3) for i in range(4)]
+    results = go_through_checks(target=FakeTarget(), checks=checks, budget=0.5)
+    assert [r.status for r in results.results] == [PASSED, TIMEOUT, TIMEOUT, TIMEOUT]
+    assert list(results.results)[-1].logs == ["Run budget exhausted."]
+
+
+def test_files_probed_in_one_exec(tmpdir):
+    tmpdir.join("help.1").write("help")
+    tmpdir.mkdir("empty")
+    present = [str(tmpdir.join("help.1")), str(tmpdir.join("empty"))]
+    missing = [str(tmpdir.join("README.md")), str(tmpdir.join("missing dir", "file"))]
+    checks = [FileCheck(message="m", description="d", reference_url="u", tags=["t"],
+                        files=present[:1] + missing, all_must_be_present=False),
+              FileCheck(message="m", description="d", reference_url="u", tags=["t"],
+                        files=present + missing[:1], all_must_be_present=True),
+              FileCheck(message="m", description="d", reference_url="u", tags=["t"],
+                        files=missing, all_must_be_present=False)]
+    container = LocalContainer()
+    target = Target(target=container, logging_level=10)
+
+    results = go_through_checks(target=target, checks=checks, workers=2)
+    assert [r.status for r in results.results] == [PASSED, FAILED, FAILED]
+    assert len(container.commands) == 1
+    assert target.files_present(present) == {p: True for p in present}
+    assert target.files_present(missing) == {p: False for p in missing}
+    assert len(container.commands) == 1
+
+
+class FakeBackend(object):
+    """ backend without any container, only the 'present' image exists """
+
+    def __init__(self):
+        self.lookups = []
+
+    def ContainerClass(self, image, container_id):
+        from docker.errors import NotFound
+
+        self.lookups.append(container_id)
+        raise NotFound("No such container")
+
+    def ImageClass(self, repository, tag=None, pull_policy=None):
+        return FakeImage(present=repository == "present")
+
+
+class FakeImage(object):
+
+    def __init__(self, present):
+        self.present = present
+
+    def is_present(self):
+        return self.present
+
+
+def test_injected_backend_is_reused():
+    import colin
+
+    backend = FakeBackend()
+    results = colin.run_many(targets=["missing:1", "other:2"], backend=backend,
+                             ruleset={"version": "1", "checks": []})
+    assert [(t, str(r)) for t, r in results.results] == [("missing:1", "Target not found."),
+                                                         ("other:2", "Target not found.")]
+    assert backend.lookups == ["missing:1", "other:2"]
+    assert Target(target="present:1", logging_level=10, backend=backend).instance.present
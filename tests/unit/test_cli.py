@@ -14,16 +14,21 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import json
+import os
+
 from click.testing import CliRunner
-from colin.cli.colin import check, list_checks, list_rulesets
+from colin.cli.colin import check, check_many, list_checks, list_rulesets
+
+DOCKERFILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "Dockerfile")
 
 
-def _call_colin(fnc, parameters=None):
+def _call_colin(fnc, parameters=None, input=None):
     runner = CliRunner()
     if not parameters:
-        return runner.invoke(fnc)
+        return runner.invoke(fnc, input=input)
     else:
-        return runner.invoke(fnc, parameters)
+        return runner.invoke(fnc, parameters, input=input)
 
 
 def _common_help_options(result):
@@ -51,6 +56,35 @@ def test_check_help_command():
     assert result.exit_code == 0
     _common_help_options(result)
     assert "-s, --stat" in result.output
+    assert "-j, --jobs" in result.output
+
+
+def test_check_many_help_command():
+    result = _call_colin(check_many, parameters=["-h"])
+    assert result.exit_code == 0
+    _common_help_options(result)
+    assert "-F, --targets-file FILENAME" in result.output
+    assert "-p, --processes" in result.output
+
+
+def test_check_many_without_targets():
+    result = _call_colin(check_many)
+    assert result.exit_code == 2
+    assert "No target provided." in result.output
+
+
+def test_check_many(tmpdir):
+    json_file = str(tmpdir.join("results.json"))
+    result = _call_colin(check_many,
+                         parameters=[DOCKERFILE, "-F", "-", "--json", json_file],
+                         input="# dockerfiles\n\n{}\n".format(DOCKERFILE))
+    assert result.exit_code == 0
+    assert result.output.count(DOCKERFILE + ":") == 2
+    with open(json_file) as fd:
+        report = json.load(fd)
+    assert [t["target"] for t in report["targets"]] == [DOCKERFILE, DOCKERFILE]
+    for t in report["targets"]:
+        assert [c["status"] for c in t["checks"]] == ["PASS", "PASS", "PASS"]
 
 
 def test_list_checks():
@@ -113,3 +147,112 @@ Options:
 """
     assert result.exit_code == 0
     assert result.output == expected_result
+
+
+def test_check_json_lines(tmpdir):
+    json_lines_file = str(tmpdir.join("results.jsonl"))
+    result = _call_colin(check, parameters=[DOCKERFILE, "--json-lines", json_lines_file])
+    assert result.exit_code == 0
+    with open(json_lines_file) as fd:
+        lines = [json.loads(l) for l in fd]
+    assert [l["name"] for l in lines] == ["maintainer_label",
+                                          "from_tag_not_latest",
+                                          "maintainer_deprecated"]
+
+
+def test_check_many_json_lines(tmpdir):
+    json_lines_file = str(tmpdir.join("results.jsonl"))
+    result = _call_colin(check_many, parameters=[DOCKERFILE, DOCKERFILE,
+                                                 "--json-lines", json_lines_file])
+    assert result.exit_code == 0
+    with open(json_lines_file) as fd:
+        lines = [json.loads(l) for l in fd]
+    assert len(lines) == 6
+    assert all(l["target"] == DOCKERFILE and l["status"] == "PASS" for l in lines)
+
+
+def test_check_many_json_lines_and_json(tmpdir):
+    json_lines_file = str(tmpdir.join("results.jsonl"))
+    json_file = str(tmpdir.join("results.json"))
+    result = _call_colin(check_many, parameters=[DOCKERFILE, DOCKERFILE, "--timings",
+                                                 "--json-lines", json_lines_file,
+                                                 "--json", json_file])
+    assert result.exit_code == 0
+    with open(json_lines_file) as fd:
+        assert len(fd.readlines()) == 6
+    with open(json_file) as fd:
+        report = json.load(fd)
+    assert [len(t["checks"]) for t in report["targets"]] == [3, 3]
+
+
+def test_check_directory(tmpdir):
+    with open(DOCKERFILE) as fd:
+        content = fd.read()
+    tmpdir.join("Dockerfile").write(content)
+    tmpdir.mkdir("app").join("Containerfile.prod").write(content)
+    json_file = str(tmpdir.join("results.json"))
+    result = _call_colin(check, parameters=[str(tmpdir), "-p", "2", "--json", json_file])
+    assert result.exit_code == 0
+    with open(json_file) as fd:
+        report = json.load(fd)
+    assert [t["target"] for t in report["targets"]] == [
+        str(tmpdir.join("Dockerfile")),
+        str(tmpdir.join("app", "Containerfile.prod")),
+    ]
+    for t in report["targets"]:
+        assert [c["status"] for c in t["checks"]] == ["PASS", "PASS", "PASS"]
+        # measured in the worker processes
+        assert {"target", "checks", "cleanup"} <= set(t["timings"])
+        assert all(c["duration"] is not None for c in t["checks"])
+
+
+def test_check_timings():
+    result = _call_colin(check, parameters=[DOCKERFILE, "--timings"])
+    assert result.exit_code == 0
+    assert "Phases (seconds):" in result.output
+    assert "check_loading" in result.output
+    assert "maintainer_label" in result.output.split("Checks (seconds, CPU seconds):")[1]
+
+
+def test_check_zero_timeout():
+    result = _call_colin(check, parameters=[DOCKERFILE, "--timeout", "0"])
+    assert result.exit_code == 0
+    assert "TIMEOUT" not in result.output
+
+
+def test_check_metrics(tmpdir):
+    metrics_file = tmpdir.join("colin.prom")
+    result = _call_colin(check, parameters=[DOCKERFILE, "--metrics", str(metrics_file)])
+    assert result.exit_code == 0
+    assert 'colin_checks_total{check="maintainer_label",status="PASS"} 1' in metrics_file.read()
+
+
+def test_check_empty_directory(tmpdir):
+    result = _call_colin(check, parameters=[str(tmpdir)])
+    assert result.exit_code == 1
+    assert "No dockerfile found" in result.output
+
+
+def test_check_changed_only_not_dockerfile(tmpdir):
+    result = _call_colin(check, parameters=["fedora:29", "--changed-only",
+                                            "--cache-dir", str(tmpdir.join("cache"))])
+    assert result.exit_code == 1
+    assert "'fedora:29' is not a dockerfile" in result.output
+    assert not tmpdir.join("cache").check()
+
+
+def test_check_many_changed_only(tmpdir):
+    with open(DOCKERFILE) as fd:
+        tmpdir.join("Dockerfile").write(fd.read())
+    tmpdir.join("README.md").write("readme")
+    changed_files = "\n".join(str(tmpdir.join(f)) for f in ["Dockerfile", "README.md", "removed"])
+    parameters = ["--changed-only", "--cache-dir", str(tmpdir.join("cache")), "-F", "-"]
+
+    result = _call_colin(check_many, parameters=parameters, input=changed_files)
+    assert result.exit_code == 0
+    assert result.output.count(str(tmpdir.join("Dockerfile")) + ":") == 1
+    assert "README.md" not in result.output
+
+    result = _call_colin(check_many, parameters=parameters, input=changed_files)
+    assert result.exit_code == 0
+    assert "Dockerfile" not in result.output
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+
+from colin.core.discovery import find_dockerfiles
+
+
+def test_find_dockerfiles_in_directory(tmpdir):
+    for path in ["Dockerfile", "README.md", "app/Containerfile", "app/Dockerfile.prod",
+                 "app/src/main.py", ".git/Dockerfile"]:
+        tmpdir.join(path).ensure()
+
+    assert find_dockerfiles(str(tmpdir)) == [
+        str(tmpdir.join("Dockerfile")),
+        str(tmpdir.join("app", "Containerfile")),
+        str(tmpdir.join("app", "Dockerfile.prod")),
+    ]
+    assert find_dockerfiles(str(tmpdir.join("README.md"))) is None
+    assert find_dockerfiles(str(tmpdir.join("missing"))) is None
+
+
+def test_find_dockerfiles_bare_name_is_not_directory(tmpdir, monkeypatch):
+    tmpdir.join("fedora", "Dockerfile").ensure()
+    monkeypatch.chdir(str(tmpdir))
+
+    # can be an image as well
+    assert find_dockerfiles("fedora") is None
+    assert find_dockerfiles(os.path.join(".", "fedora")) == [
+        os.path.join(".", "fedora", "Dockerfile")]
+    assert find_dockerfiles(".") == [os.path.join(".", "fedora", "Dockerfile")]
+
+
+def test_find_dockerfiles_by_pattern(tmpdir):
+    for path in ["a/Dockerfile", "b/Dockerfile", "b/c/Containerfile", "README.md"]:
+        tmpdir.join(path).ensure()
+
+    assert find_dockerfiles(os.path.join(str(tmpdir), "*", "Dockerfile")) == [
+        str(tmpdir.join("a", "Dockerfile")),
+        str(tmpdir.join("b", "Dockerfile")),
+    ]
+    # directories matched by the pattern are searched
+    assert find_dockerfiles(os.path.join(str(tmpdir), "b*")) == [
+        str(tmpdir.join("b", "Dockerfile")),
+        str(tmpdir.join("b", "c", "Containerfile")),
+    ]
+    assert find_dockerfiles(os.path.join(str(tmpdir), "*.txt")) == []
+
+
+def test_find_dockerfiles_by_pattern_skips_other_files(tmpdir):
+    for path in ["svc/Dockerfile", "svc/README.md", "svc/Containerfile.dev"]:
+        tmpdir.join(path).ensure()
+
+    assert find_dockerfiles(os.path.join(str(tmpdir), "svc", "*")) == [
+        str(tmpdir.join("svc", "Containerfile.dev")),
+        str(tmpdir.join("svc", "Dockerfile")),
+    ]
+    assert find_dockerfiles(os.path.join(str(tmpdir), "svc", "*.md")) == []
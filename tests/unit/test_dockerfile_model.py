@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import io
+
+import colin
+from colin.core.constant import ERROR, FAILED, PASSED
+from colin.core.target import Target, TargetType
+
+DOCKERFILE = b"""ARG BASE=fedora:30
+FROM ${BASE} AS builder
+ENV VERSION=1.0
+LABEL name="builder-$VERSION" \\
+      version=$VERSION
+RUN make
+FROM registry.example.com/app:latest
+MAINTAINER me
+LABEL name=app
+RUN dnf install -y app
+"""
+
+
+def test_dockerfile_model():
+    target = Target(target=io.BytesIO(DOCKERFILE), logging_level=10)
+    assert target.target_type == TargetType.DOCKERFILE
+
+    model = target.dockerfile
+    assert target.dockerfile is model
+    assert model.baseimage == "registry.example.com/app:latest"
+    assert model.labels == {"name": "app"}
+    assert target.labels == {"name": "app"}
+    assert model.is_multistage
+    assert [i["value"] for i in model.get_instructions("RUN")] == ["make", "dnf install -y app"]
+    assert model.get_instructions("ENTRYPOINT") == ()
+
+    builder, final = model.stages
+    assert (builder.index, builder.name, builder.baseimage) == (0, "builder", "fedora:30")
+    assert builder.labels == {"name": "builder-1.0", "version": "1.0"}
+    assert builder.envs == {"VERSION": "1.0"}
+    assert [i["instruction"] for i in builder.instructions] == ["FROM", "ENV", "LABEL", "RUN"]
+    assert (final.index, final.name) == (1, None)
+    assert len(final.get_instructions("MAINTAINER")) == 1
+
+
+def test_empty_dockerfile_model():
+    model = Target(target=io.BytesIO(b""), logging_level=10).dockerfile
+    assert model.stages == ()
+    assert model.baseimage is None
+    assert model.labels == {}
+
+
+MULTISTAGE_DOCKERFILE = b"""FROM fedora:30 AS builder
+LABEL name=builder
+RUN make
+FROM builder AS test
+RUN make test
+FROM registry.example.com/app:1.0
+LABEL name=app
+"""
+
+
+def test_stages_scoping():
+    ruleset = {
+        "version": "1",
+        "checks": [
+            {"name": "from_tag_not_latest", "stages": "all"},
+            {"name": "name_label"},
+            {"name": "name_label", "stages": ["builder"]},
+            {"name": "name_label", "stages": ["Builder", "test"]},
+            {"name": "name_label", "stages": ["missing"]},
+        ]
+    }
+    results = list(colin.run(target=io.BytesIO(MULTISTAGE_DOCKERFILE),
+                             ruleset=ruleset).results)
+    # the stage 'test' has the name label of the stage 'builder'
+    assert [r.status for r in results] == [PASSED, PASSED, PASSED, PASSED, ERROR]
+    assert results[0].logs == ["stage 'builder': PASS",
+                               "stage 'test': PASS",
+                               "stage 'test': Built from the stage 'builder'.",
+                               "stage '2': PASS"]
+    assert results[3].logs == ["stage 'builder': PASS", "stage 'test': PASS"]
+
+
+def test_stage_inherits_from_base_stage():
+    dockerfile = b"""FROM fedora:30 AS builder
+ENV VERSION=1.0
+LABEL name=builder
+FROM builder AS test
+ARG SUFFIX=-test
+LABEL version=$VERSION$SUFFIX
+ENV VERSION=2.0
+"""
+    model = Target(target=io.BytesIO(dockerfile), logging_level=10).dockerfile
+    builder, test = model.stages
+    assert test.base_stage is builder
+    assert test.labels == {"name": "builder", "version": "1.0-test"}
+    assert test.envs == {"VERSION": "2.0"}
+    assert test.args == {"SUFFIX": "-test"}
+    assert builder.labels == {"name": "builder"}
+    assert model.labels == test.labels
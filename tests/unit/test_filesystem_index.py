@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import io
+import stat
+import tarfile
+
+import colin
+from colin.core.filesystem_index import FilesystemIndex
+from tests.unit.test_image_archive import create_docker_archive
+
+
+def _layer(*members):
+    """ tarfile with the members: (name, type, extra TarInfo attributes) """
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w") as tar:
+        for name, member_type, attributes in members:
+            info = tarfile.TarInfo(name)
+            info.type = member_type
+            for key, value in attributes.items():
+                setattr(info, key, value)
+            content = b"x" * info.size if member_type == tarfile.REGTYPE else b""
+            tar.addfile(info, io.BytesIO(content))
+    data.seek(0)
+    return tarfile.open(fileobj=data, mode="r|")
+
+
+def _file(name, **attributes):
+    return name, tarfile.REGTYPE, attributes
+
+
+def _dir(name, **attributes):
+    return name, tarfile.DIRTYPE, attributes
+
+
+def _symlink(name, target):
+    return name, tarfile.SYMTYPE, {"linkname": target}
+
+
+def test_filesystem_index():
+    index = FilesystemIndex.from_layers([
+        _layer(_dir("etc", mode=0o755),
+               _file("etc/passwd", mode=0o644, size=10),
+               _file("etc/shadow", mode=0o000, size=3),
+               _file("usr/bin/sh", mode=0o755, uid=1, gid=2, size=4),
+               _file("opt/app/old", size=1),
+               _symlink("bin", "usr/bin")),
+        _layer(_file("opt/app/new", size=1),
+               _file("opt/app/.wh..wh..opq"),
+               _file("etc/.wh.shadow"),
+               _file("etc/passwd", mode=0o600, size=20)),
+    ])
+
+    passwd = index.get("/etc/passwd")
+    assert passwd.size == 20
+    assert stat.S_IMODE(passwd.mode) == 0o600
+    assert not index.file_is_present("/etc/shadow")
+
+    assert index.file_is_present("/opt/app/new")
+    assert not index.file_is_present("/opt/app/old")
+    assert index.get("/opt/app").is_dir
+
+    sh = index.get("/bin/sh")
+    assert sh.path == "/usr/bin/sh"
+    assert (sh.uid, sh.gid, sh.size) == (1, 2, 4)
+    assert index.get("/bin", follow_symlinks=False).is_symlink
+    assert index.get("/bin").is_dir
+    assert index.get("/usr").is_dir
+    assert not index.file_is_present("/bin/bash")
+
+
+def test_filesystem_index_whiteout_of_implicit_directory():
+    index = FilesystemIndex.from_layers([
+        _layer(_file("srv/www/data/index.html", size=1),
+               _file("srv/www/conf", size=1),
+               _file("srv/keep", size=1)),
+        _layer(_file("srv/.wh.www")),
+        _layer(_file("srv/www/data/new", size=1)),
+    ])
+    assert index.file_is_present("/srv/keep")
+    assert index.file_is_present("/srv/www/data/new")
+    assert not index.file_is_present("/srv/www/data/index.html")
+    assert not index.file_is_present("/srv/www/conf")
+
+
+def test_filesystem_index_symlink_loop():
+    index = FilesystemIndex.from_layers([_layer(_symlink("a", "b"), _symlink("b", "/a"))])
+    assert index.get("/a", follow_symlinks=False).is_symlink
+    assert index.get("/a") is None
+    assert index.file_is_present("/a")
+    assert not index.file_is_present("/a/b")
+
+
+def test_filesystem_index_dangling_symlink():
+    index = FilesystemIndex.from_layers([_layer(_symlink("etc/localtime", "/usr/share/UTC"))])
+    assert index.get("/etc/localtime") is None
+    assert index.file_is_present("/etc/localtime")
+
+
+def test_file_check_uses_filesystem_index(tmpdir):
+    path = str(tmpdir.join("image.tar"))
+    create_docker_archive(path, [{"etc/os-release": b"fedora"}, {"help.1": b"help"}])
+
+    results = colin.run(target=path, ruleset={
+        "version": "1",
+        "checks": [{"name": "help_file_or_readme"}],
+    })
+    result = list(results.results)[0]
+    assert result.status == "PASS"
+    assert "File '/help.1' is present." in result.logs
+    assert "File '/README.md' is not present." in result.logs
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import io
+import json
+import tarfile
+
+import pytest
+
+import colin
+from colin.core.image_archive import ImageArchive
+from colin.core.target import Target, TargetType
+
+CONFIG = {
+    "architecture": "amd64",
+    "os": "linux",
+    "config": {
+        "Cmd": ["/bin/sh"],
+        "Env": ["PATH=/usr/bin:/bin"],
+        "Labels": {"name": "archived", "maintainer": "me"},
+        "User": "1001",
+    },
+}
+
+
+def _tar_bytes(files, mode="w"):
+    """ tarball with the files (dict: name -> bytes) """
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode=mode) as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+def _digest(content):
+    return "sha256:" + hashlib.sha256(content).hexdigest()
+
+
+def create_docker_archive(path, layers):
+    config = json.dumps(CONFIG).encode()
+    files = {"config.json": config}
+    for i, layer in enumerate(layers):
+        files["layer{}/layer.tar".format(i)] = _tar_bytes(layer)
+    files["manifest.json"] = json.dumps([{
+        "Config": "config.json",
+        "RepoTags": ["archived:1"],
+        "Layers": ["layer{}/layer.tar".format(i) for i in range(len(layers))],
+    }]).encode()
+    with open(path, "wb") as fd:
+        fd.write(_tar_bytes(files))
+    return _digest(config)
+
+
+def create_oci_layout(directory, layers):
+    blobs = directory.mkdir("blobs").mkdir("sha256")
+
+    def add_blob(content):
+        digest = _digest(content)
+        blobs.join(digest.split(":")[1]).write_binary(content)
+        return {"digest": digest, "size": len(content)}
+
+    config = json.dumps(CONFIG).encode()
+    manifest = {
+        "schemaVersion": 2,
+        "config": add_blob(config),
+        "layers": [add_blob(_tar_bytes(layer, mode="w:gz")) for layer in layers],
+    }
+    directory.join("index.json").write(json.dumps({
+        "schemaVersion": 2,
+        "manifests": [add_blob(json.dumps(manifest).encode())],
+    }))
+    directory.join("oci-layout").write('{"imageLayoutVersion": "1.0.0"}')
+    return _digest(config)
+
+
+@pytest.fixture(params=["docker", "oci"])
+def image_archive(request, tmpdir):
+    layers = [{"etc/os-release": b"fedora"}, {"help.1": b"help"}]
+    if request.param == "docker":
+        path = str(tmpdir.join("image.tar"))
+        digest = create_docker_archive(path, layers)
+    else:
+        path = str(tmpdir.mkdir("oci"))
+        digest = create_oci_layout(tmpdir.join("oci"), layers)
+    return path, digest
+
+
+def test_image_archive(image_archive):
+    path, digest = image_archive
+    assert ImageArchive.is_image_archive(path)
+
+    target = Target(target=path, logging_level=10)
+    assert target.target_type == TargetType.IMAGE
+    assert target.metadata.id == digest
+    assert target.metadata.user == "1001"
+    assert target.labels == {"name": "archived", "maintainer": "me"}
+
+    layer_files = [[m.name for m in layer] for layer in target.instance.layers()]
+    assert layer_files == [["etc/os-release"], ["help.1"]]
+
+
+def test_run_on_image_archive(image_archive):
+    path, _ = image_archive
+    ruleset = {
+        "version": "1",
+        "checks": [{"name": "maintainer_label"},
+                   {"name": "name_label"},
+                   {"name": "no_root"},
+                   {"name": "help_label"}]
+    }
+    results = colin.run(target=path, ruleset=ruleset)
+    assert [r.status for r in results.results] == ["PASS", "PASS", "PASS", "FAIL"]
+
+
+def test_dockerfile_is_not_image_archive():
+    assert not ImageArchive.is_image_archive(__file__)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.dirname(__file__))
+PROJECT_DIR = os.path.dirname(TESTS_DIR)
+DOCKERFILE = os.path.join(TESTS_DIR, "data", "Dockerfile")
+
+SCRIPT = """
+import sys
+from click.testing import CliRunner
+from colin.cli.colin import cli
+
+result = CliRunner().invoke(cli, {args!r})
+assert result.exit_code in [0, 3], result.output
+print(",".join(sorted(m for m in sys.modules
+                      if m.split(".")[0] in ["conu", "docker"] or m == "colin.core.server")))
+"""
+
+
+@pytest.mark.parametrize("args", [
+    ["check", DOCKERFILE],
+    ["check", DOCKERFILE, "-r", "fedora"],
+    ["list-checks", "-r", "fedora"],
+    ["list-rulesets"],
+])
+def test_docker_is_not_imported(args):
+    """
+    dockerfile checks and listing must not pay for the import of conu and docker
+    (nor of the http server)
+    """
+    output = subprocess.check_output([sys.executable, "-c", SCRIPT.format(args=args)],
+                                     cwd=PROJECT_DIR)
+    assert output.decode().strip() == ""
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import itertools
+
+import pytest
+
+from colin.core.checks.check_utils import check_label
+from colin.core.checks.labels import (DeprecatedLabelAbstractCheck, LabelAbstractCheck,
+                                      LabelRuleEngine)
+from colin.core.ruleset.ruleset import Ruleset
+from colin.core.target import TargetType
+
+TARGET_LABELS = [
+    None,
+    {},
+    {"name": "fedora"},
+    {"name": "fedora", "summary": "Fedora base image"},
+    {"name": "Fedora", "com.redhat.component": "fedora", "vendor": "x"},
+]
+
+
+class FakeTarget(object):
+
+    def __init__(self, labels):
+        self.labels = labels
+
+
+def _label_check(labels, required, value_regex):
+    return LabelAbstractCheck(message="m", description="d", reference_url="u", tags=["t"],
+                              labels=labels, required=required, value_regex=value_regex)
+
+
+def _deprecated_check(old_label, new_label):
+    return DeprecatedLabelAbstractCheck(message="m", description="d", reference_url="u",
+                                        tags=["t"], old_label=old_label, new_label=new_label)
+
+
+@pytest.mark.parametrize("target_labels", TARGET_LABELS)
+def test_engine_matches_check_label(target_labels):
+    label_checks = [
+        _label_check(labels, required, value_regex)
+        for labels, required, value_regex in itertools.product(
+            [["name"], ["summary", "name"], ["vendor"], ["missing"]],
+            [True, False],
+            [None, "^[a-z]+$", ".*"])
+    ]
+    deprecated_checks = [_deprecated_check("name", "summary"),
+                         _deprecated_check("vendor", "missing"),
+                         _deprecated_check("missing", "name")]
+    engine = LabelRuleEngine(label_checks + deprecated_checks)
+    target = FakeTarget(target_labels)
+
+    for check in label_checks:
+        expected = check_label(labels=check.labels,
+                               required=check.required,
+                               value_regex=check.value_regex,
+                               target_labels=target_labels)
+        assert engine.is_passing(check=check, target=target) == expected
+    for check in deprecated_checks:
+        check.label_rule_engine = None
+        expected = check.check(target).ok
+        assert engine.is_passing(check=check, target=target) == expected
+
+
+def test_engine_evaluates_target_once():
+    check = _label_check(["name"], True, None)
+    engine = LabelRuleEngine([check])
+    target = FakeTarget({"name": "fedora"})
+    assert engine.is_passing(check=check, target=target)
+    target.labels = {}
+    assert engine.is_passing(check=check, target=target)
+
+
+def test_ruleset_attaches_engine():
+    checks = Ruleset(ruleset_name="fedora").get_checks(target_type=TargetType.IMAGE)
+    label_checks = [c for c in checks
+                    if isinstance(c, (LabelAbstractCheck, DeprecatedLabelAbstractCheck))]
+    assert label_checks
+    engine = label_checks[0].label_rule_engine
+    assert engine is not None
+    assert len(engine) == len(label_checks)
+    assert all(c.label_rule_engine is engine for c in label_checks)
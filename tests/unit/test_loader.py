@@ -18,7 +18,19 @@ import os
 import shutil
 
 import colin.checks
-from colin.core.loader import CheckLoader
+from colin.core.loader import CheckLoader, generate_manifest
+
+CHECKS_FILE_CONTENT = """
+from colin.core.checks.labels import LabelAbstractCheck
+
+
+class {0}Check(LabelAbstractCheck):
+    name = "{1}"
+
+    def __init__(self):
+        super({0}Check, self).__init__(message="m", description="d", reference_url="u",
+                                       tags=["{1}"], labels=["{1}"], required=True)
+"""
 
 
 def test_upstream_checks_can_be_loaded():
@@ -36,3 +48,50 @@ def test_loading_custom_check(tmpdir):
     shutil.copytree(a_check_dir, str(tmpdir.join("a_check")))
     l = CheckLoader(str(tmpdir))
     assert len(l.check_classes) == 1
+
+
+def test_check_classes_are_cached(tmpdir):
+    tests_dir = os.path.dirname(os.path.dirname(__file__))
+    a_check_dir = os.path.join(tests_dir, "data", "a_check")
+    shutil.copytree(a_check_dir, str(tmpdir.join("a_check")))
+
+    first = CheckLoader(str(tmpdir)).check_classes
+    second = CheckLoader(str(tmpdir)).check_classes
+    assert first == second
+
+    l = CheckLoader(str(tmpdir))
+    reloaded = l.reload()
+    assert len(reloaded) == 1
+    assert reloaded[0] is not first[0]
+
+    check_file = tmpdir.join("a_check", "__init__.py")
+    mtime = os.path.getmtime(str(check_file))
+    os.utime(str(check_file), (mtime + 10, mtime + 10))
+    modified = CheckLoader(str(tmpdir)).check_classes
+    assert modified[0] is not reloaded[0]
+
+
+def test_manifest(tmpdir):
+    checks_dir = tmpdir.mkdir("manifested_checks")
+    checks_dir.join("first.py").write(CHECKS_FILE_CONTENT.format("First", "first"))
+    checks_dir.join("second.py").write(CHECKS_FILE_CONTENT.format("Second", "second"))
+
+    manifest = generate_manifest(str(checks_dir))
+    assert manifest["checks"]["first"] == {
+        "file": "first.py",
+        "class": "FirstCheck",
+        "tags": ["first"],
+        "target_types": ["container", "dockerfile", "image"],
+    }
+    assert sorted(manifest["files"]) == ["first.py", "second.py"]
+
+    l = CheckLoader(str(checks_dir))
+    assert l.manifest
+    assert l.get_check_class("second").__name__ == "SecondCheck"
+    # only the manifest was used, the directory was not scanned
+    assert l._check_classes is None
+
+    checks_dir.join("third.py").write(CHECKS_FILE_CONTENT.format("Third", "third"))
+    l = CheckLoader(str(checks_dir))
+    assert l.manifest is None
+    assert l.get_check_class("third").__name__ == "ThirdCheck"
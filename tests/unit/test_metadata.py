@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from colin.core.metadata import TargetMetadata
+
+
+def test_metadata_accessors():
+    metadata = TargetMetadata({
+        "Id": "sha256:123",
+        "Config": {
+            "Cmd": ["/bin/bash"],
+            "Entrypoint": None,
+            "Env": ["PATH=/usr/bin:/bin", "OPTS=--a=b", "EMPTY="],
+            "ExposedPorts": {"8080/tcp": {}, "53/udp": {}},
+            "Labels": {"name": "colin"},
+            "User": "1001",
+        }
+    })
+    assert metadata.cmd == ["/bin/bash"]
+    assert metadata.entrypoint is None
+    assert metadata.env == {"PATH": "/usr/bin:/bin", "OPTS": "--a=b", "EMPTY": ""}
+    assert metadata.exposed_ports == ["53/udp", "8080/tcp"]
+    assert metadata.labels == {"name": "colin"}
+    assert metadata.user == "1001"
+
+
+def test_metadata_without_config():
+    metadata = TargetMetadata({"Config": None})
+    assert metadata.config == {}
+    assert metadata.env == {}
+    assert metadata.labels is None
+    assert metadata.user is None
+    assert metadata.exposed_ports == []
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from colin.core.check_runner import go_through_checks
+from colin.core.checks.filesystem import FileCheck
+from colin.core.constant import ERROR, FAILED, PASSED
+from colin.core.observer import Observer, PrometheusExporter
+from colin.core.target import Target
+from tests.unit.test_check_runner import FakeTarget, LocalContainer, SleepyCheck
+
+
+class RecordingObserver(Observer):
+
+    def __init__(self):
+        self.events = []
+
+    def on_check_start(self, target, check):
+        self.events.append(("start", check.name))
+
+    def on_check_end(self, target, check, result):
+        self.events.append(("end", check.name, result.status, result.duration is not None))
+
+    def on_docker_call(self, operation, duration, error=None):
+        self.events.append(("docker", operation, error is None))
+
+
+class BrokenObserver(Observer):
+
+    def on_check_start(self, target, check):
+        raise RuntimeError("broken observer")
+
+
+def test_observers_around_checks():
+    observer = RecordingObserver()
+    checks = [SleepyCheck("passes", 0), SleepyCheck("broken", 0, ok=None)]
+    results = go_through_checks(target=FakeTarget(), checks=checks,
+                                observers=[BrokenObserver(), observer])
+    assert [r.status for r in results.results] == [PASSED, ERROR]
+    assert observer.events == [("start", "passes"), ("end", "passes", PASSED, True),
+                               ("start", "broken"), ("end", "broken", ERROR, True)]
+
+
+def test_docker_calls_observed(tmpdir):
+    observer = RecordingObserver()
+    target = Target(target=LocalContainer(), logging_level=10, observers=[observer])
+    check = FileCheck(message="m", description="d", reference_url="u", tags=["t"],
+                      files=[str(tmpdir.join("missing"))], all_must_be_present=True)
+    check.name = "file"
+    results = go_through_checks(target=target, checks=[check], observers=[observer])
+    assert [r.status for r in results.results] == [FAILED]
+    assert observer.events == [("docker", "inspect", True),
+                               ("docker", "exec", True),
+                               ("start", "file"),
+                               ("end", "file", FAILED, True)]
+
+
+def test_prometheus_exporter(tmpdir):
+    exporter = PrometheusExporter(buckets=(0.1, 1.0))
+    results = go_through_checks(target=FakeTarget(),
+                                checks=[SleepyCheck("fast", 0), SleepyCheck("fast", 0, ok=False),
+                                        SleepyCheck("slow", 0.2)],
+                                observers=[exporter])
+    list(results.results)
+    exporter.on_docker_call("exec", 0.5)
+    exporter.on_docker_call("exec", 2.0, error=RuntimeError("failed"))
+
+    metrics = exporter.render()
+    assert 'colin_checks_total{check="fast",status="FAIL"} 1' in metrics
+    assert 'colin_checks_total{check="fast",status="PASS"} 1' in metrics
+    assert 'colin_check_duration_seconds_bucket{check="slow",le="0.1"} 0' in metrics
+    assert 'colin_check_duration_seconds_bucket{check="slow",le="1"} 1' in metrics
+    assert 'colin_check_duration_seconds_count{check="fast"} 2' in metrics
+    assert 'colin_docker_calls_total{operation="exec"} 2' in metrics
+    assert 'colin_docker_call_errors_total{operation="exec"} 1' in metrics
+    assert 'colin_docker_call_duration_seconds_bucket{le="1",operation="exec"} 1' in metrics
+    assert 'colin_docker_call_duration_seconds_bucket{le="+Inf",operation="exec"} 2' in metrics
+    assert 'colin_docker_call_duration_seconds_sum{operation="exec"} 2.5' in metrics
+
+    metrics_file = tmpdir.join("colin.prom")
+    exporter.dump(str(metrics_file))
+    assert metrics_file.read() == metrics
+    assert tmpdir.listdir() == [metrics_file]
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+
+import pytest
+import six
+
+from colin.core.constant import FAILED, PASSED
+from colin.core.result import BatchCheckResults, CheckResult, CheckResults
+
+
+def without_timings(results_json):
+    """ drop the measured times, they differ in every run """
+    results_json = dict(results_json)
+    results_json.pop("timings", None)
+    results_json["checks"] = [{k: v for k, v in check.items() if k not in ("duration", "cpu_time")}
+                              for check in results_json["checks"]]
+    return results_json
+
+
+def _result(name, ok, tags, check_type):
+    result = CheckResult(ok=ok, description="d", message="m", reference_url="u",
+                         check_name=name, logs=[])
+    result.tags = tags
+    result.check_type = check_type
+    return result
+
+
+def test_results_are_obtained_only_once():
+    obtained = []
+
+    def generator():
+        for result in [_result("a", True, ["label", "required"], "LabelAbstractCheck"),
+                       _result("b", False, ["label"], "LabelAbstractCheck"),
+                       _result("c", False, ["cmd"], "CmdAbstractCheck")]:
+            obtained.append(result.check_name)
+            yield result
+
+    results = CheckResults(results=generator())
+    assert results.ok
+    assert results.fail
+    assert results.statistics == {PASSED: 1, FAILED: 2}
+    assert results.tag_statistics == {"label": {PASSED: 1, FAILED: 1},
+                                      "required": {PASSED: 1},
+                                      "cmd": {FAILED: 1}}
+    assert results.check_type_statistics == {"LabelAbstractCheck": {PASSED: 1, FAILED: 1},
+                                             "CmdAbstractCheck": {FAILED: 1}}
+    assert "FAIL:2" in results.get_pretty_string(stat=False, verbose=False)
+    assert len(results._dict_of_results["checks"]) == 3
+    assert obtained == ["a", "b", "c"]
+
+
+def test_timings():
+    fast = _result("fast", True, [], None)
+    fast.duration = 0.1
+    slow = _result("slow", False, [], None)
+    slow.duration, slow.cpu_time = 2.0, 1.5
+    cached = _result("cached", True, [], None)
+    results = CheckResults(results=[fast, slow, cached], timings={"ruleset": 0.5})
+    assert results.check_timings == [("slow", 2.0, 1.5), ("fast", 0.1, None)]
+    assert results.phase_timings == {"ruleset": 0.5}
+    results_json = results._dict_of_results
+    assert results_json["timings"] == {"ruleset": 0.5}
+    assert [(c["duration"], c["cpu_time"]) for c in results_json["checks"]] == \
+        [(0.1, None), (2.0, 1.5), (None, None)]
+
+    batch = BatchCheckResults(results=[("a", results),
+                                       ("b", CheckResults(results=[slow], timings={"target": 1}))],
+                              timings={"ruleset": 0.25})
+    assert batch.check_timings == [("slow", 4.0, 3.0), ("fast", 0.1, None)]
+    assert batch.phase_timings == {"ruleset": 0.75, "target": 1}
+    assert batch._dict_of_results["timings"] == {"ruleset": 0.25}
+    assert batch._dict_of_results["targets"][1]["timings"] == {"target": 1}
+
+
+def test_stream_json_lines_without_keeping_results():
+    def generator():
+        yield _result("a", True, [], None)
+        yield _result("b", False, [], None)
+
+    batch = BatchCheckResults(results=[("t1", CheckResults(results=generator())),
+                                       ("t2", CheckResults(results=generator()))])
+    lines = six.StringIO()
+    batch.stream_json_lines_to_file(lines, keep_results=False)
+    assert batch.get_pretty_string(stat=True, verbose=False) == "t1:\n.x\nt2:\n.x\n"
+    assert [(l["target"], l["name"]) for l in map(json.loads, lines.getvalue().splitlines())] == \
+        [("t1", "a"), ("t1", "b"), ("t2", "a"), ("t2", "b")]
+    assert batch.statistics == {PASSED: 2, FAILED: 2}
+    for _, target_results in batch.results:
+        assert target_results.results.vals == []
+        with pytest.raises(RuntimeError):
+            list(target_results.results)
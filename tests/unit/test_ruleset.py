@@ -126,3 +126,80 @@ def test_ruleset_override():
     assert len(checks) == 1
     assert checks[0].message == m
     assert checks[0].just == "testing"
+
+
+def test_ruleset_invalid_regex():
+    r = {
+        "version": "1",
+        "checks": [
+            {
+                "name": "name_label",
+                "value_regex": "fedora[0-9"
+            }
+        ]
+    }
+    r = Ruleset(ruleset=r)
+    with pytest.raises(ColinRulesetException) as ex:
+        r.get_checks(None)
+    assert "fedora[0-9" in str(ex.value)
+
+
+def test_compiled_regexes_are_cached():
+    from colin.core.checks import check_utils
+
+    pattern = check_utils.compile_regex("^cached-[a-z]+$")
+    assert check_utils.compile_regex("^cached-[a-z]+$") is pattern
+    for i in range(check_utils.REGEX_CACHE_SIZE):
+        check_utils.compile_regex("pattern-{}".format(i))
+    assert len(check_utils._regex_cache) == check_utils.REGEX_CACHE_SIZE
+    assert "^cached-[a-z]+$" not in check_utils._regex_cache
+
+
+@pytest.mark.parametrize("stages,valid", [
+    ("final", True),
+    ("all", True),
+    (["builder", "test"], True),
+    ("builder", False),
+    ([], False),
+    ([1], False),
+])
+def test_ruleset_stages(stages, valid):
+    r = Ruleset(ruleset={
+        "version": "1",
+        "checks": [
+            {
+                "name": "name_label",
+                "stages": stages
+            }
+        ]
+    })
+    if valid:
+        assert r.get_checks(None)[0].stages == stages
+    else:
+        with pytest.raises(ColinRulesetException):
+            r.get_checks(None)
+
+
+@pytest.mark.parametrize("timeout,valid", [
+    (10, True),
+    (0.5, True),
+    (0, False),
+    (-1, False),
+    ("10", False),
+    (True, False),
+])
+def test_ruleset_timeout(timeout, valid):
+    r = Ruleset(ruleset={
+        "version": "1",
+        "checks": [
+            {
+                "name": "name_label",
+                "timeout": timeout
+            }
+        ]
+    })
+    if valid:
+        assert r.get_checks(None)[0].timeout == timeout
+    else:
+        with pytest.raises(ColinRulesetException):
+            r.get_checks(None)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import socket
+import threading
+
+import pytest
+from six.moves import http_client
+
+import colin
+from colin.core.exceptions import ColinException
+from colin.core.server import MAX_CACHED_RULESETS, ColinService
+from tests.unit.test_result import without_timings
+
+DOCKERFILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "Dockerfile")
+
+
+@pytest.fixture()
+def server():
+    service = ColinService(ruleset={"version": "1",
+                                    "checks": [{"name": "maintainer_label"},
+                                               {"name": "from_tag_not_latest"}]})
+    server = service.create_server(port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(server, method, path, body=None):
+    connection = http_client.HTTPConnection(*server.server_address[:2])
+    try:
+        connection.request(method, path, body=body,
+                           headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read().decode("utf-8"))
+    finally:
+        connection.close()
+
+
+def test_health(server):
+    status, content = _request(server, "GET", "/health")
+    assert status == 200
+    assert content["status"] == "ok"
+
+
+def test_check_target(server):
+    status, content = _request(server, "POST", "/check", json.dumps({"target": DOCKERFILE}))
+    assert status == 200
+    expected = colin.run(target=DOCKERFILE,
+                         ruleset={"version": "1",
+                                  "checks": [{"name": "maintainer_label"},
+                                             {"name": "from_tag_not_latest"}]})
+    assert without_timings(content) == without_timings(json.loads(expected.json))
+
+
+def test_check_dockerfile_content(server):
+    request = {"dockerfile": "FROM fedora:latest\n",
+               "ruleset": {"version": "1", "checks": [{"name": "from_tag_not_latest"}]}}
+    for _ in range(2):
+        status, content = _request(server, "POST", "/check", json.dumps(request))
+        assert status == 200
+        assert [c["status"] for c in content["checks"]] == ["FAIL"]
+
+
+def test_inline_rulesets_are_not_kept_forever():
+    service = ColinService(ruleset={"version": "1", "checks": []})
+    for i in range(MAX_CACHED_RULESETS + 10):
+        ruleset = {"version": "1",
+                   "checks": [{"name": "maintainer_label", "value_regex": "me-{}".format(i)}]}
+        results = service.check({"target": DOCKERFILE, "ruleset": ruleset})
+        assert results.statistics
+    assert len(service._rulesets) == MAX_CACHED_RULESETS
+    assert len(service._checks) == MAX_CACHED_RULESETS
+
+
+@pytest.mark.parametrize("method,path,body,expected_status", [
+    ("POST", "/check", "not json", 400),
+    ("POST", "/check", json.dumps({"tags": ["x"]}), 400),
+    ("POST", "/check", json.dumps({"target": DOCKERFILE, "ruleset_name": "missing"}), 400),
+    ("GET", "/check", None, 404),
+])
+def test_bad_requests(server, method, path, body, expected_status):
+    status, content = _request(server, method, path, body)
+    assert status == expected_status
+    assert content["error"]
+
+
+def test_unix_socket(tmpdir):
+    socket_path = str(tmpdir.join("colin.sock"))
+    server = ColinService().create_server(socket_path=socket_path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(socket_path)
+        client.sendall(b"GET /health HTTP/1.0\r\n\r\n")
+        response = b""
+        while True:
+            data = client.recv(4096)
+            if not data:
+                break
+            response += data
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert response.startswith(b"HTTP/1.0 200")
+    assert json.loads(response.split(b"\r\n\r\n", 1)[1].decode("utf-8"))["status"] == "ok"
+
+
+def test_unix_socket_does_not_replace_files(tmpdir):
+    socket_path = tmpdir.join("colin.sock")
+    socket_path.write("data")
+    with pytest.raises(ColinException):
+        ColinService().create_server(socket_path=str(socket_path))
+    assert socket_path.read() == "data"